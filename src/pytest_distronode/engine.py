@@ -0,0 +1,316 @@
+"""Session-lived execution engine shared by the module dispatchers."""
+from __future__ import annotations
+
+import functools
+import multiprocessing
+import os
+import signal
+import threading
+import weakref
+
+from distronode.constants import DEFAULT_FORKS
+from distronode.errors import DistronodeError
+from distronode.executor.stats import AggregateStats
+from distronode.executor.task_queue_manager import TaskQueueManager
+from distronode.plugins.callback import CallbackBase
+
+from pytest_distronode.inventory import dump_inventory, load_inventory
+
+
+PASSWORDS = {"conn_pass": None, "become_pass": None}
+
+
+def _cleanup(tqm, pid):
+    """Tear down `tqm`, unless the finalizer runs in a forked process."""
+    # garbage inherited by forked processes may be collected there
+    if os.getpid() == pid:
+        tqm.cleanup()
+
+
+class ExecutionEngine:  # pylint: disable=too-many-instance-attributes
+    """Keep a TaskQueueManager warm across module calls.
+
+    Building a TaskQueueManager creates a result queue, a connection lock file
+    and loads every enabled callback plugin. The engine builds it once per host
+    manager and only tears it down when the CLI context it was built under
+    changes, or at the end of the session.
+    """
+
+    def __init__(self, inventory, variable_manager, loader) -> None:
+        """Initialize the engine for an inventory/variable manager pair.
+
+        :param inventory: The inventory manager plays are run against
+        :param variable_manager: The variable manager used to compute host vars
+        :param loader: The data loader shared with the inventory
+        """
+        self.inventory = inventory
+        self.variable_manager = variable_manager
+        self.loader = loader
+        self.builds = 0
+        self._key = None
+        self._tqm = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+        # the forked run reading the result queue of the queue manager, if any
+        self._busy = None
+
+    def _build(self, key):
+        """Create a new TaskQueueManager, cleaning up the previous one."""
+        self.cleanup()
+        self._tqm = TaskQueueManager(
+            inventory=self.inventory,
+            variable_manager=self.variable_manager,
+            loader=self.loader,
+            passwords=PASSWORDS,
+        )
+        # load the callback plugins here rather than on the first run, which
+        # may happen in a forked child, see `start`, and be lost with it
+        self._tqm._stdout_callback = CallbackBase()
+        self._tqm.load_callbacks()
+        self._tqm._stdout_callback = None
+        self._key = key
+        self._busy = None
+        self.builds += 1
+        # Tear the queue manager down when the engine is collected or at exit
+        self._finalizer = weakref.finalize(self, _cleanup, self._tqm, os.getpid())
+
+    def run(self, play, callback, key=None, forks=None):
+        """Run `play`, sending runner events to `callback`.
+
+        :param play: The loaded play to execute
+        :param callback: The stdout callback receiving results for this run
+        :param key: A hashable description of the CLI context; a different key
+            than the previous run rebuilds the TaskQueueManager
+        :param forks: The maximum number of worker processes for this run
+        :returns: The TaskQueueManager return code
+        """
+        with self._lock:
+            if self._tqm is None or key != self._key or self._is_busy():
+                self._build(key)
+            tqm = self._tqm
+
+            # Results of one call must not leak into the next one
+            tqm._stdout_callback = callback
+            tqm._forks = forks or DEFAULT_FORKS
+            tqm._stats = AggregateStats()
+            tqm._failed_hosts = {}
+            tqm._unreachable_hosts = {}
+            tqm._terminated = False
+            try:
+                return tqm.run(play)
+            finally:
+                tqm._stdout_callback = None
+
+    def start(self, play, callback, key=None, forks=None):
+        """Run `play` in a forked process, concurrently with the caller.
+
+        Distronode's plugin loaders and strategies are not thread-safe, so the
+        play runs in a child forked before the caller starts its own work. The
+        child sends the callback `results` back through a pipe and, when the
+        callback has an `on_result` hook, every host result as it arrives.
+        The facts the play sets and the hosts and groups it adds are sent
+        back too, see `_changes`, and applied to the caller's managers.
+        While a forked run uses the queue manager, the following ones build
+        their own in the child, so that concurrent runs never share a queue.
+
+        :param play: The loaded play to execute
+        :param callback: The stdout callback receiving results for this run
+        :param key: A hashable description of the CLI context
+        :param forks: The maximum number of worker processes for this run
+        :returns: The `ForkedRun` of the play
+        """
+        with self._lock:
+            # build in the parent, so that the queue manager stays warm
+            if self._tqm is None or key != self._key:
+                self._build(key)
+            private = self._is_busy()
+
+            mp_context = multiprocessing.get_context("fork")
+            reader, writer = mp_context.Pipe(duplex=False)
+            process = mp_context.Process(
+                target=self._run_child,
+                args=(writer, play, callback, key, forks, private),
+            )
+            process.start()
+            writer.close()
+            run = ForkedRun(
+                process,
+                reader,
+                callback,
+                engine=self,
+                tqm=None if private else self._tqm,
+            )
+            if not private:
+                self._busy = run
+        return run
+
+    def _is_busy(self):
+        """Return whether a forked run is using the queue manager."""
+        return self._busy is not None and not self._busy.done
+
+    def _run_child(  # pylint: disable=too-many-arguments
+        self,
+        writer,
+        play,
+        callback,
+        key,
+        forks,
+        private=False,
+    ):
+        """Run `play` and send the results of `callback` through `writer`."""
+        # pylint: disable=broad-exception-caught
+        # the lock was held by the parent when forking
+        self._lock = threading.Lock()
+        if private:
+            # the parent keeps its queue manager, which another run is using
+            self._finalizer.detach()
+            self._finalizer = None
+            self._build(key)
+        if getattr(callback, "on_result", None) is not None:
+            callback.on_result = lambda *event: writer.send(("result", *event))
+        signal.signal(
+            signal.SIGTERM,
+            functools.partial(self._terminate_child, os.getpid()),
+        )
+        try:
+            self.run(play, callback, key=key, forks=forks)
+        except Exception as exc:  # noqa: BLE001
+            try:
+                writer.send(("done", exc, None))
+            except Exception:  # noqa: BLE001
+                writer.send(("done", DistronodeError(str(exc)), None))
+        else:
+            writer.send(("done", None, callback.results, self._changes(callback)))
+        finally:
+            writer.close()
+
+    def _caches(self):
+        """Return the caches of the variable manager plays change, by kind."""
+        return {
+            "facts": self.variable_manager._fact_cache,
+            "nonpersistent_facts": self.variable_manager._nonpersistent_fact_cache,
+            "vars": self.variable_manager._vars_cache,
+        }
+
+    def _changes(self, callback):
+        """Return the changes the play made to the managers of this engine.
+
+        The facts and variables of the hosts contacted by the play are
+        returned, and the whole inventory when `callback` reports that the
+        play added hosts or groups, see `_apply_changes`.
+        """
+        names = getattr(callback, "contacted", None) or {}
+        changes = {
+            kind: {name: cache[name] for name in names if name in cache}
+            for kind, cache in self._caches().items()
+        }
+        changes["inventory"] = None
+        if getattr(callback, "changed_inventory", False):
+            changes["inventory"] = dump_inventory(self.inventory)
+        return changes
+
+    def _apply_changes(self, changes):
+        """Apply the changes made by a play run in a forked process, see `_changes`."""
+        for kind, cache in self._caches().items():
+            for name, value in changes[kind].items():
+                cache[name] = value
+        if changes["inventory"] is not None:
+            load_inventory(self.inventory, changes["inventory"])
+
+    def _terminate_child(self, pid, signum, frame):
+        """Stop the workers of the play running in this child, then exit."""
+        # the workers forked by the play inherit this handler
+        if os.getpid() == pid:
+            for worker in getattr(self._tqm, "_workers", None) or []:
+                if worker and worker.is_alive():
+                    worker.terminate()
+        os._exit(1)
+
+    def cleanup(self):
+        """Tear down the current TaskQueueManager, if any."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._finalizer = None
+        self._tqm = None
+        self._key = None
+
+
+class ForkedRun:  # pylint: disable=too-many-instance-attributes
+    """A play running in a forked process, see `ExecutionEngine.start`."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        process,
+        connection,
+        callback,
+        engine=None,
+        tqm=None,
+    ) -> None:
+        """Initialize the run.
+
+        :param process: The process running the play
+        :param connection: The end of the pipe the process sends messages to
+        :param callback: The callback updated with the messages of the process
+        :param engine: The engine which started the process
+        :param tqm: The queue manager of the engine the process runs the play
+            with, None when the process built its own
+        """
+        self.process = process
+        self.connection = connection
+        self.callback = callback
+        self.engine = engine
+        self.tqm = tqm
+        self.pid = os.getpid()
+        self.done = False
+        self.error = None
+
+    def receive(self):
+        """Handle the next message sent by the process running the play.
+
+        Host results are passed to the `on_result` hook of the callback, the
+        final results are set on the callback itself and the changes the play
+        made are applied to the engine, see `ExecutionEngine._changes`.
+        """
+        try:
+            kind, *args = self.connection.recv()
+        except EOFError:
+            self._finish(None, None)
+            self.error = DistronodeError(
+                f"Process running the play exited unexpectedly ({self.process.exitcode})",
+            )
+            return
+        if kind == "result":
+            self.callback.on_result(*args)
+        else:
+            self._finish(*args)
+
+    def _finish(self, error, results, changes=None):
+        self.done = True
+        self.error = error
+        self.connection.close()
+        self.process.join()
+        for name, value in (results or {}).items():
+            setattr(self.callback, name, value)
+        if changes is not None and self.engine is not None:
+            self.engine._apply_changes(changes)
+
+    def wait(self):
+        """Wait for the play to finish, raising the error it failed with, if any."""
+        while not self.done:
+            self.receive()
+        if self.error is not None:
+            raise self.error
+
+    def terminate(self):
+        """Stop the play, unless it already finished."""
+        # only the process which started the play may stop it
+        if self.done or os.getpid() != self.pid:
+            return
+        self.process.terminate()
+        self._finish(None, None)
+        # the process may have been stopped while holding the lock of the
+        # result queue it shared with the engine, which must not reuse it
+        if self.tqm is not None:
+            with self.engine._lock:
+                if self.engine._tqm is self.tqm:
+                    self.engine.cleanup()
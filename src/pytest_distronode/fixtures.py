@@ -21,6 +21,22 @@ def distronode_module(distronode_adhoc):
     return getattr(host_mgr, host_mgr.options["host_pattern"])
 
 
+@pytest.fixture()
+def distronode_adhoc_async(distronode_adhoc):
+    """Return an inventory initialization method, whose dispatchers run module calls as coroutines."""
+
+    def init_host_mgr(**kwargs):
+        return distronode_adhoc(**kwargs).async_
+
+    return init_host_mgr
+
+
+@pytest.fixture()
+def distronode_module_async(distronode_module):
+    """Return the async view of a subclass of BaseModuleDispatcher."""
+    return distronode_module.async_
+
+
 @pytest.fixture()
 def distronode_facts(distronode_module):
     """Return distronode_facts dictionary."""
@@ -1,12 +1,22 @@
 """Fixme."""
 
+import collections
+import weakref
+
 import distronode
 
+from distronode.errors import DistronodeError
+from distronode.vars.fact_cache import FactCache
+
 from pytest_distronode.has_version import (
     has_distronode_v2,
     has_distronode_v212,
     has_distronode_v213,
 )
+from pytest_distronode.inventory import InventoryIndex, VarsIndex, load_inventory
+
+
+DEFAULT_POOL_SIZE = 8
 
 
 class BaseHostManager:
@@ -25,36 +35,171 @@ class BaseHostManager:
 
         # Initialize distronode inventory manager
         self.initialize_inventory()
+        self.options["inventory_index"] = InventoryIndex(
+            self.options["inventory_manager"],
+            self.options.get("extra_inventory_manager"),
+        )
+        self.options["vars_index"] = VarsIndex(
+            self.options["inventory_manager"],
+            self.options["variable_manager"],
+            self.options.get("extra_inventory_manager"),
+            self.options.get("extra_variable_manager"),
+        )
+        # semaphores limiting concurrent async module calls, per event loop
+        self.options["async_semaphores"] = weakref.WeakKeyDictionary()
 
     def _default_dispatcher(self, **kwargs):
         pass
 
+    @property
+    def async_(self):
+        """Return a view of the host manager whose dispatchers run module calls as coroutines."""
+        return AsyncHostManager(self)
+
     def get_extra_inventory_hosts(self, host_pattern=None):
         """Fixme."""
-        try:
-            if host_pattern is None:
-                extra_inventory_hosts = [
-                    h.name for h in self.options["extra_inventory_manager"].list_hosts()
-                ]
-            else:
-                extra_inventory_hosts = [
-                    h.name
-                    for h in self.options["extra_inventory_manager"].list_hosts(
-                        host_pattern,
-                    )
-                ]
-        except KeyError:
-            extra_inventory_hosts = []
-        return extra_inventory_hosts
+        if host_pattern is None:
+            host_pattern = "all"
+        if "extra_inventory_names" in self.options:
+            # the extra inventory was merged into the inventory
+            extra_host_names = self.options["extra_inventory_names"][0]
+            return [h for h in self._hosts(host_pattern)[0] if h in extra_host_names]
+        return list(self._hosts(host_pattern)[1])
 
     def get_extra_inventory_groups(self):
         """Fixme."""
+        if "extra_inventory_names" in self.options:
+            groups = self.options["inventory_manager"].groups
+            return {
+                name: group
+                for name, group in groups.items()
+                if name in self.options["extra_inventory_names"][1]
+            }
         try:
             extra_inventory_groups = self.options["extra_inventory_manager"].groups
         except KeyError:
             extra_inventory_groups = []
         return extra_inventory_groups
 
+    def query_vars(self, host_pattern="all", keys=None):
+        """Return the variables of the hosts matching `host_pattern`, without running any module.
+
+        :param host_pattern: The distronode host pattern
+        :param keys: The names of the variables to return, all when None
+        :returns: A dict of the variables of each host, by host name, read-only
+            mappings when `keys` is None
+        """
+        vars_index = self.options["vars_index"]
+        hosts, extra_hosts = self._hosts(host_pattern)
+        result = {}
+        for host in hosts + extra_hosts:
+            host_vars = vars_index.vars(host)
+            if keys is None:
+                result[host] = host_vars
+            else:
+                result[host] = {key: host_vars[key] for key in keys if key in host_vars}
+        return result
+
+    def add_host(self, name, groups=(), **host_vars):
+        """Add the host `name` to the inventory, or to more groups.
+
+        :param name: The name of the host
+        :param groups: The names of the groups of the host, created when missing
+        :param host_vars: The variables of the host
+        """
+        self._change_inventory(
+            {
+                **{group: {"hosts": [name]} for group in groups},
+                "_meta": {"hostvars": {name: host_vars}},
+            },
+        )
+
+    def add_group(self, name, hosts=(), children=(), **group_vars):
+        """Add the group `name` to the inventory, or hosts and children to the group.
+
+        :param name: The name of the group
+        :param hosts: The names of the hosts of the group, added when missing
+        :param children: The names of the child groups, created when missing
+        :param group_vars: The variables of the group
+        """
+        self._change_inventory(
+            {
+                name: {
+                    "hosts": list(hosts),
+                    "children": list(children),
+                    "vars": group_vars,
+                },
+                **{child: {} for child in children},
+            },
+        )
+
+    def set_host_var(self, name, key, value):
+        """Set the variable `key` of the host `name` to `value`."""
+        inventory_manager = self.options["inventory_manager"]
+        if inventory_manager.get_host(name) is None:
+            raise KeyError(name)
+        inventory_manager._inventory.set_variable(name, key, value)
+        self.options["vars_index"].invalidate([name])
+        # vars do not change which hosts patterns match, keep them resolved
+        self.options["inventory_index"].generation += 1
+
+    def remove_host(self, name):
+        """Remove the host `name` from the inventory, and forget its facts."""
+        inventory_manager = self.options["inventory_manager"]
+        host = inventory_manager.get_host(name)
+        if host is None:
+            raise KeyError(name)
+        names = {name, *(group.name for group in host.get_groups())}
+        inventory_manager._inventory.remove_host(host)
+        inventory_manager._inventory._groups_dict_cache = {}
+        variable_manager = self.options["variable_manager"]
+        variable_manager.clear_facts(name)
+        variable_manager._nonpersistent_fact_cache.pop(name, None)
+        variable_manager._vars_cache.pop(name, None)
+        self.options["inventory_index"].invalidate(names)
+        # the `groups` of every host changed
+        self.options["vars_index"].invalidate()
+
+    def _change_inventory(self, data):
+        """Add `data`, see `load_inventory`, to the inventory in place.
+
+        Only the hosts resolved for the hosts and groups whose membership
+        changed are resolved again. The extra inventory is left untouched.
+        """
+        inventory_manager = self.options["inventory_manager"]
+        names = self._membership_names(data)
+        load_inventory(inventory_manager, data)
+        names.update(self._membership_names(data))
+        self.options["inventory_index"].invalidate(names)
+        # the `groups` of every host, and the vars of some, changed
+        self.options["vars_index"].invalidate()
+
+    def _membership_names(self, data):
+        """Return the names of the groups of the hosts and groups of `data`, ancestors included."""
+        inventory_manager = self.options["inventory_manager"]
+        names = {"all", "ungrouped"}
+        for name, value in data.items():
+            if name == "_meta":
+                for host_name in value["hostvars"]:
+                    host = inventory_manager.get_host(host_name)
+                    names.add(host_name)
+                    if host is not None:
+                        names.update(group.name for group in host.get_groups())
+            elif name in inventory_manager.groups:
+                names.add(name)
+                names.update(
+                    group.name
+                    for group in inventory_manager.groups[name].get_ancestors()
+                )
+        return names
+
+    def _hosts(self, host_pattern="all"):
+        """Return the host names matching `host_pattern`, within the configured limit."""
+        return self.options["inventory_index"].hosts(
+            host_pattern,
+            subset=self.options.get("subset"),
+        )
+
     def check_required_kwargs(self, **kwargs):
         """Raise a TypeError if any required kwargs are missing."""
         for kwarg in self._required_kwargs:
@@ -65,11 +210,9 @@ class BaseHostManager:
     def has_matching_inventory(self, host_pattern):
         """Return whether any matching distronode inventory is found for the provided host_pattern."""
         try:
-            return (
-                len(self.options["inventory_manager"].list_hosts(host_pattern)) > 0
-                or host_pattern in self.options["inventory_manager"].groups
-                or len(self.get_extra_inventory_hosts(host_pattern)) > 0
-                or host_pattern in self.get_extra_inventory_groups()
+            return self.options["inventory_index"].matches(
+                host_pattern,
+                subset=self.options.get("subset"),
             )
         except distronode.errors.DistronodeError:
             return False
@@ -90,43 +233,29 @@ class BaseHostManager:
             return self.__dict__[item]
         if not self.has_matching_inventory(item):
             raise KeyError(item)
-        self.options["host_pattern"] = item
-        return self._dispatcher(**self.options)
+        return self._dispatcher(**{**self.options, "host_pattern": item})
 
     def __getattr__(self, attr):
         """Return a ModuleDispatcher instance described the provided `attr`."""
         if not self.has_matching_inventory(attr):
             msg = f"type HostManager has no attribute '{attr}'"
             raise AttributeError(msg)
-        self.options["host_pattern"] = attr
-        return self._dispatcher(**self.options)
+        return self._dispatcher(**{**self.options, "host_pattern": attr})
 
     def keys(self):
         """Fixme."""
-        inventory_hosts = [
-            h.name for h in self.options["inventory_manager"].list_hosts()
-        ]
-        extra_inventory_hosts = self.get_extra_inventory_hosts()
-        return inventory_hosts + extra_inventory_hosts
+        hosts, extra_hosts = self._hosts()
+        return list(hosts + extra_hosts)
 
     def __iter__(self):
-        """Return an iterator for hosts matching the `host_pattern`."""
-        extra_hosts = self.get_extra_inventory_hosts(
-            host_pattern=self.options["host_pattern"],
-        )
-        all_hosts = self.options["inventory_manager"].list_hosts(
-            self.options["host_pattern"],
-        )
-        # Return only the name (ala .keys()
-        # Return a BaseHostManager instance initialized for each host in the inventory
-        # Return a ModuleDispatcher representing the group
-        return iter([self[h] for h in all_hosts + extra_hosts])
+        """Return an iterator of a HostHandle for each host matching the `host_pattern`."""
+        hosts, extra_hosts = self._hosts(self.options.get("host_pattern", "all"))
+        return (HostHandle(self, host) for host in hosts + extra_hosts)
 
     def __len__(self) -> int:
         """Return the number of inventory hosts."""
-        return len(self.options["inventory_manager"].list_hosts()) + len(
-            self.get_extra_inventory_hosts(),
-        )
+        hosts, extra_hosts = self._hosts()
+        return len(hosts) + len(extra_hosts)
 
     def __contains__(self, item) -> bool:
         """Return whether there is inventory matching the provided `item`."""
@@ -138,6 +267,200 @@ class BaseHostManager:
         raise NotImplementedError(msg)
 
 
+class HostHandle:
+    """A host or group of a host manager, standing for its ModuleDispatcher.
+
+    Handles only reference their host manager and pattern; the dispatcher
+    they forward to is created on first use, so that parametrizing tests over
+    a large inventory stays cheap.
+    """
+
+    __slots__ = ("host_manager", "host_pattern", "_dispatcher")
+
+    def __init__(self, host_manager, host_pattern) -> None:
+        """Initialize the handle of `host_pattern` in `host_manager`."""
+        object.__setattr__(self, "host_manager", host_manager)
+        object.__setattr__(self, "host_pattern", host_pattern)
+        object.__setattr__(self, "_dispatcher", None)
+
+    @property
+    def dispatcher(self):
+        """Return the ModuleDispatcher of the handle, creating it on first use."""
+        if self._dispatcher is None:
+            host_manager = self.host_manager
+            object.__setattr__(
+                self,
+                "_dispatcher",
+                host_manager._dispatcher(
+                    **{**host_manager.options, "host_pattern": self.host_pattern},
+                ),
+            )
+        return self._dispatcher
+
+    def __getattr__(self, attr):
+        """Return the attribute `attr` of the ModuleDispatcher."""
+        # introspection, for example by pytest, must not look up modules, and
+        # copies made without __init__ have no slots set yet
+        if attr.startswith("__") or attr in HostHandle.__slots__:
+            raise AttributeError(attr)
+        return getattr(self.dispatcher, attr)
+
+    def __setattr__(self, attr, value):
+        """Raise an AttributeError, handles are immutable."""
+        msg = f"type HostHandle is immutable, cannot set '{attr}'"
+        raise AttributeError(msg)
+
+    def __len__(self) -> int:
+        """Return the number of hosts matching the handle."""
+        return len(self.dispatcher)
+
+    def __contains__(self, item) -> bool:
+        """Return whether the ModuleDispatcher contains a host matching `item`."""
+        return item in self.dispatcher
+
+    def __repr__(self) -> str:
+        """Return a representation of the handle."""
+        return f"HostHandle({self.host_pattern!r})"
+
+
+class AsyncHostManager:
+    """Return the `async_` view of the dispatchers of a host manager."""
+
+    def __init__(self, host_manager) -> None:
+        """Initialize the view for the provided `host_manager`."""
+        self.host_manager = host_manager
+
+    def __getitem__(self, item):
+        """Return the async view of the ModuleDispatcher described by `item`."""
+        return self.host_manager[item].async_
+
+    def __getattr__(self, attr):
+        """Return the async view of the ModuleDispatcher described by `attr`."""
+        return getattr(self.host_manager, attr).async_
+
+
+def _freeze(value):
+    """Return a hashable equivalent of the configuration `value`.
+
+    Raise `TypeError` when `value` contains an unhashable object.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+class HostManagerPool:
+    """Keep the host managers initialized for the most recently used configurations.
+
+    Initializing a host manager parses the inventory, so host managers are
+    reused for as long as their keyword arguments are equal. The least
+    recently used one is evicted once the pool holds more than `size` host
+    managers, and `invalidate` drops them explicitly, for example after the
+    inventory changed on disk. Host managers whose inventory was changed in
+    place are not reused either.
+
+    Every test gets a copy of the pooled host manager, with an options dict
+    of its own, and without the facts gathered or set by the previous tests.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE) -> None:
+        """Initialize an empty pool.
+
+        :param size: The maximum number of host managers kept, 0 disables the pool
+        """
+        self.size = DEFAULT_POOL_SIZE if size is None else size
+        self._host_managers = collections.OrderedDict()
+
+    def get(self, **kwargs):
+        """Return a host manager initialized with `kwargs`, from the pool if possible."""
+        try:
+            key = _freeze(kwargs)
+        except TypeError:
+            key = None
+        if key is None or self.size <= 0:
+            return get_host_manager(**kwargs)
+
+        try:
+            self._host_managers.move_to_end(key)
+            host_manager = self._host_managers[key]
+        except KeyError:
+            pass
+        else:
+            if host_manager.options["inventory_index"].generation == 0:
+                return self._checkout(host_manager)
+            # the inventory was changed in place, see BaseHostManager.add_host
+            self._release(self._host_managers.pop(key))
+
+        host_manager = self._host_managers[key] = get_host_manager(**kwargs)
+        while len(self._host_managers) > self.size:
+            _, evicted = self._host_managers.popitem(last=False)
+            self._release(evicted)
+        return self._checkout(host_manager)
+
+    @staticmethod
+    def _checkout(host_manager):
+        """Return a copy of the pooled `host_manager`, forgetting the facts of its previous users.
+
+        The copy shares the inventory and engines of `host_manager`, but not
+        its options dict.
+        """
+        for name in ("variable_manager", "extra_variable_manager"):
+            variable_manager = host_manager.options.get(name)
+            if variable_manager is None:
+                continue
+            # a new fact cache is what a new variable manager starts with
+            try:
+                variable_manager._fact_cache = FactCache()
+            except DistronodeError:
+                variable_manager._fact_cache = {}
+            variable_manager._nonpersistent_fact_cache.clear()
+            variable_manager._vars_cache.clear()
+        host_manager.options["vars_index"].invalidate()
+        # __getattr__ resolves hosts, so the copy is built without copy.copy
+        checked_out = object.__new__(type(host_manager))
+        checked_out.__dict__.update(host_manager.__dict__)
+        checked_out.options = dict(host_manager.options)
+        return checked_out
+
+    def invalidate(self, **kwargs):
+        """Drop the host manager initialized with `kwargs`, or all of them without `kwargs`."""
+        if kwargs:
+            try:
+                evicted = [self._host_managers.pop(_freeze(kwargs))]
+            except (KeyError, TypeError):
+                evicted = []
+        else:
+            evicted = list(self._host_managers.values())
+            self._host_managers.clear()
+        for host_manager in evicted:
+            self._release(host_manager)
+
+    @staticmethod
+    def _release(host_manager):
+        """Tear down the task queue managers of an evicted `host_manager`."""
+        for name in ("engine", "extra_engine"):
+            engine = host_manager.options.get(name)
+            if engine is not None:
+                engine.cleanup()
+
+    def __len__(self) -> int:
+        """Return the number of pooled host managers."""
+        return len(self._host_managers)
+
+    def __contains__(self, host_manager) -> bool:
+        """Return whether `host_manager`, or the one it was checked out from, is pooled."""
+        inventory_index = host_manager.options["inventory_index"]
+        return any(
+            item.options["inventory_index"] is inventory_index
+            for item in self._host_managers.values()
+        )
+
+
 def get_host_manager(*args, **kwargs):
     """Initialize and return a HostManager instance."""
     if has_distronode_v213:
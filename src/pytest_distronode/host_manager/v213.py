@@ -1,9 +1,16 @@
 """Fixme."""
-from distronode.inventory.manager import InventoryManager
 from distronode.parsing.dataloader import DataLoader
 from distronode.vars.manager import VariableManager
 
+from pytest_distronode.engine import ExecutionEngine
 from pytest_distronode.host_manager import BaseHostManager
+from pytest_distronode.inventory import (
+    InventorySnapshot,
+    build_inventory,
+    dump_inventory,
+    load_inventory,
+    parse_inventory,
+)
 from pytest_distronode.module_dispatcher.v213 import ModuleDispatcherV213
 
 
@@ -15,24 +22,77 @@ class HostManagerV213(BaseHostManager):
         super().__init__(*args, **kwargs)
         self._dispatcher = ModuleDispatcherV213
 
+    def _inventory_manager(self, loader, sources):
+        """Return the InventoryManager of `sources`, from the snapshot cache when enabled.
+
+        `sources` may also be the hosts, groups and vars of the inventory, as
+        a dict in the format of dynamic inventory scripts.
+        """
+        if isinstance(sources, dict):
+            return build_inventory(loader, sources)
+        ttl = self.options.get("inventory_cache")
+        directory = self.options.get("inventory_cache_dir")
+        workers = self.options.get("inventory_workers")
+        if ttl and directory:
+            snapshot = InventorySnapshot(sources, directory, ttl, workers=workers)
+            return snapshot.inventory_manager(loader)
+        return parse_inventory(loader, sources, workers=workers)
+
     def initialize_inventory(self):
         """Fixme."""
         self.options["loader"] = DataLoader()
-        self.options["inventory_manager"] = InventoryManager(
-            loader=self.options["loader"],
-            sources=self.options["inventory"],
+        self.options["inventory_manager"] = self._inventory_manager(
+            self.options["loader"],
+            self.options["inventory"],
         )
         self.options["variable_manager"] = VariableManager(
             loader=self.options["loader"],
             inventory=self.options["inventory_manager"],
         )
-        if "extra_inventory" in self.options:
+        self.options["engine"] = ExecutionEngine(
+            inventory=self.options["inventory_manager"],
+            variable_manager=self.options["variable_manager"],
+            loader=self.options["loader"],
+        )
+        if self.options.get("extra_inventory") and self.options.get(
+            "merge_extra_inventory",
+        ):
+            self._merge_extra_inventory()
+        elif self.options.get("extra_inventory"):
             self.options["extra_loader"] = DataLoader()
-            self.options["extra_inventory_manager"] = InventoryManager(
-                loader=self.options["extra_loader"],
-                sources=self.options["extra_inventory"],
+            self.options["extra_inventory_manager"] = self._inventory_manager(
+                self.options["extra_loader"],
+                self.options["extra_inventory"],
             )
             self.options["extra_variable_manager"] = VariableManager(
                 loader=self.options["extra_loader"],
                 inventory=self.options["extra_inventory_manager"],
             )
+            self.options["extra_engine"] = ExecutionEngine(
+                inventory=self.options["extra_inventory_manager"],
+                variable_manager=self.options["extra_variable_manager"],
+                loader=self.options["extra_loader"],
+            )
+
+    def _merge_extra_inventory(self):
+        """Add the hosts, groups and vars of the extra inventory to the inventory.
+
+        The names of the hosts and groups defined by the extra inventory are
+        kept, for `get_extra_inventory_hosts` and `get_extra_inventory_groups`.
+        """
+        inventory_manager = self.options["inventory_manager"]
+        extra_inventory_manager = self._inventory_manager(
+            self.options["loader"],
+            self.options["extra_inventory"],
+        )
+        data = dump_inventory(extra_inventory_manager)
+        load_inventory(inventory_manager, data)
+        # variables plugins look for group_vars and host_vars next to the sources
+        inventory_manager._sources = [
+            *inventory_manager._sources,
+            *extra_inventory_manager._sources,
+        ]
+        self.options["extra_inventory_names"] = (
+            frozenset(data["_meta"]["hostvars"]),
+            frozenset(name for name in data if name != "_meta"),
+        )
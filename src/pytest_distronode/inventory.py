@@ -0,0 +1,520 @@
+"""Host resolution shared by a host manager and its module dispatchers."""
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import types
+
+from pathlib import Path
+
+import distronode
+import distronode.constants
+
+from distronode.inventory.manager import InventoryManager
+from distronode.module_utils.common.json import DistronodeJSONEncoder
+from distronode.parsing.ajson import DistronodeJSONDecoder
+
+
+# Characters with a meaning in host patterns, which plain names never contain
+PATTERN_CHARACTERS = frozenset("*?[]~,:&!@ ")
+
+
+def is_name(pattern):
+    """Return whether `pattern` can only match a host or group by its name."""
+    return (
+        isinstance(pattern, str)
+        and pattern != ""
+        and PATTERN_CHARACTERS.isdisjoint(pattern)
+        and pattern not in distronode.constants.LOCALHOST
+    )
+
+
+def _subset_key(subset):
+    """Return a hashable equivalent of the limit `subset`, a pattern or a list of them."""
+    if isinstance(subset, list):
+        return tuple(subset)
+    return subset
+
+
+class InventoryIndex:
+    """Cache the hosts matching a pattern across the inventory managers.
+
+    Resolved host names are cached per (pattern, subset), until the inventory
+    itself changes, see `invalidate`, so a module call resolves its hosts
+    once, and the limit is only applied to the inventory managers when it
+    actually changes, which keeps their own pattern caches. The generation
+    counts the changes of the inventory. Hosts or groups added behind the
+    index's back, by the add_host module for instance, change the size of
+    the inventory, which invalidates the index too.
+    """
+
+    def __init__(self, inventory_manager, extra_inventory_manager=None) -> None:
+        """Initialize the index.
+
+        :param inventory_manager: The inventory manager
+        :param extra_inventory_manager: The extra inventory manager, if any
+        """
+        self.inventory_manager = inventory_manager
+        self.extra_inventory_manager = extra_inventory_manager
+        self.generation = 0
+        self._subset = None
+        self._hosts = {}
+        self._names = None
+        self._size = self._measure()
+
+    def _measure(self):
+        """Return the numbers of hosts and groups of both inventories."""
+        size = (len(self.inventory_manager.hosts), len(self.inventory_manager.groups))
+        if self.extra_inventory_manager is not None:
+            size += (
+                len(self.extra_inventory_manager.hosts),
+                len(self.extra_inventory_manager.groups),
+            )
+        return size
+
+    def _check_size(self):
+        """Invalidate the index if hosts or groups were added or removed without it."""
+        if self._measure() != self._size:
+            self.invalidate()
+
+    def invalidate(self, names=None):
+        """Forget resolved hosts, after the inventory changed.
+
+        :param names: The names of the hosts and groups whose membership
+            changed, None when any may have. Hosts resolved for other names
+            are kept, unless limited to a subset.
+        """
+        self.generation += 1
+        self._names = None
+        self._size = self._measure()
+        self.inventory_manager.clear_caches()
+        if names is None:
+            if self.extra_inventory_manager is not None:
+                self.extra_inventory_manager.clear_caches()
+            self._hosts = {}
+            return
+        self._hosts = {
+            (pattern, subset): hosts
+            for (pattern, subset), hosts in self._hosts.items()
+            if is_name(pattern) and pattern not in names and not subset
+        }
+
+    def names(self):
+        """Return the names of the hosts, and of the groups, of both inventories."""
+        self._check_size()
+        if self._names is None:
+            host_names = set(self.inventory_manager.hosts)
+            group_names = set(self.inventory_manager.groups)
+            if self.extra_inventory_manager is not None:
+                host_names.update(self.extra_inventory_manager.hosts)
+                group_names.update(self.extra_inventory_manager.groups)
+            self._names = (frozenset(host_names), frozenset(group_names))
+        return self._names
+
+    def matches(self, pattern, subset=None):
+        """Return whether `pattern` matches a group, or a host within `subset`.
+
+        Plain names are looked up in `names`. Patterns, implicit localhost and
+        hosts which may be excluded by `subset` are evaluated.
+        """
+        if is_name(pattern):
+            host_names, group_names = self.names()
+            if pattern in group_names:
+                return True
+            if pattern not in host_names:
+                return False
+            if not subset:
+                return True
+
+        hosts, extra_hosts = self.hosts(pattern, subset=subset)
+        return (
+            len(hosts) > 0
+            or len(extra_hosts) > 0
+            or pattern in self.inventory_manager.groups
+            or (
+                self.extra_inventory_manager is not None
+                and pattern in self.extra_inventory_manager.groups
+            )
+        )
+
+    def apply_subset(self, subset):
+        """Limit the inventory managers to `subset`, unless already done."""
+        key = _subset_key(subset)
+        if key == self._subset:
+            return
+        self.inventory_manager.subset(subset)
+        if self.extra_inventory_manager is not None:
+            self.extra_inventory_manager.subset(subset)
+        self._subset = key
+
+    def count(self):
+        """Return the number of hosts in the inventories, regardless of any limit."""
+        count = len(self.inventory_manager.hosts)
+        if self.extra_inventory_manager is not None:
+            count += len(self.extra_inventory_manager.hosts)
+        return count
+
+    def hosts(self, pattern="all", subset=None):
+        """Return the names of the hosts matching `pattern`, limited to `subset`.
+
+        :param pattern: The distronode host pattern
+        :param subset: The limit applied to the inventory managers
+        :returns: A tuple of the matching host names in the inventory, and of
+            the ones in the extra inventory
+        """
+        self._check_size()
+        self.apply_subset(subset)
+        key = (pattern, _subset_key(subset))
+        try:
+            return self._hosts[key]
+        except KeyError:
+            pass
+
+        hosts = tuple(
+            getattr(host, "name", host)
+            for host in self.inventory_manager.list_hosts(pattern)
+        )
+        extra_hosts = ()
+        if self.extra_inventory_manager is not None:
+            extra_hosts = tuple(
+                getattr(host, "name", host)
+                for host in self.extra_inventory_manager.list_hosts(pattern)
+            )
+        self._hosts[key] = (hosts, extra_hosts)
+        return self._hosts[key]
+
+
+class VarsIndex:
+    """Cache the variables of the hosts across the inventory managers.
+
+    The variables of a host are computed by its variable manager, as for a
+    module call without play, the first time they are asked for, and kept
+    until `invalidate` is called for that host, for example after a module
+    call which may have set its facts. They are not templated.
+    """
+
+    def __init__(
+        self,
+        inventory_manager,
+        variable_manager,
+        extra_inventory_manager=None,
+        extra_variable_manager=None,
+    ) -> None:
+        """Initialize the index.
+
+        :param inventory_manager: The inventory manager
+        :param variable_manager: The variable manager of the inventory
+        :param extra_inventory_manager: The extra inventory manager, if any
+        :param extra_variable_manager: The variable manager of the extra inventory, if any
+        """
+        self.managers = [(inventory_manager, variable_manager)]
+        if extra_inventory_manager is not None:
+            self.managers.append((extra_inventory_manager, extra_variable_manager))
+        self._vars = {}
+
+    def invalidate(self, names=None):
+        """Forget the variables of the hosts `names`, or of all hosts when None."""
+        if names is None:
+            self._vars = {}
+            return
+        for name in names:
+            self._vars.pop(name, None)
+
+    def vars(self, name):  # noqa: A003
+        """Return a read-only mapping of the variables of the host `name`.
+
+        Raise `KeyError` when no inventory has such a host.
+        """
+        try:
+            return self._vars[name]
+        except KeyError:
+            pass
+        for inventory_manager, variable_manager in self.managers:
+            host = inventory_manager.hosts.get(name)
+            if host is not None:
+                host_vars = variable_manager.get_vars(host=host, include_hostvars=False)
+                self._vars[name] = types.MappingProxyType(host_vars)
+                return self._vars[name]
+        raise KeyError(name)
+
+
+def dump_inventory(inventory_manager):
+    """Return the hosts, groups and vars of `inventory_manager`.
+
+    The data uses the format of the dynamic inventory scripts, hosts vars
+    included in `_meta`.
+    """
+    data = {
+        "_meta": {
+            "hostvars": {
+                name: dict(host.vars) for name, host in inventory_manager.hosts.items()
+            },
+        },
+    }
+    for name, group in inventory_manager.groups.items():
+        group_vars = dict(group.vars)
+        if group.priority != 1:
+            group_vars["distronode_group_priority"] = group.priority
+        data[name] = {
+            "hosts": [host.name for host in group.hosts],
+            "vars": group_vars,
+            "children": [child.name for child in group.child_groups],
+        }
+    return data
+
+
+def load_inventory(inventory_manager, data):
+    """Add the hosts, groups and vars of `data`, see `dump_inventory`, to `inventory_manager`.
+
+    As in dynamic inventory scripts, `_meta` and the keys of a group are
+    optional, and a group may be given as the list of its hosts.
+    """
+    inventory = inventory_manager._inventory
+    groups = {
+        name: {"hosts": group} if isinstance(group, list) else group
+        for name, group in data.items()
+        if name != "_meta"
+    }
+    hostvars = data.get("_meta", {}).get("hostvars", {})
+    for name in groups:
+        inventory.add_group(name)
+    for name in hostvars:
+        inventory.add_host(name)
+    for group in groups.values():
+        for name in group.get("hosts", ()):
+            inventory.add_host(name)
+    for name, host_vars in hostvars.items():
+        for key, value in host_vars.items():
+            inventory.set_variable(name, key, value)
+    for name, group in groups.items():
+        for child in group.get("children", ()):
+            inventory.add_child(name, child)
+        for host in group.get("hosts", ()):
+            inventory.add_child(name, host)
+        for key, value in group.get("vars", {}).items():
+            inventory.set_variable(name, key, value)
+    inventory_manager.reconcile_inventory()
+
+
+def build_inventory(loader, data):
+    """Return an InventoryManager populated from `data`, see `load_inventory`, without parsing."""
+    inventory_manager = InventoryManager(loader=loader, parse=False)
+    load_inventory(inventory_manager, data)
+    return inventory_manager
+
+
+def split_sources(sources):
+    """Return the list of inventory sources in `sources`.
+
+    A string is split on commas when each part is an existing path, otherwise
+    it is a single source, such as a list of hosts.
+    """
+    if not isinstance(sources, str):
+        return list(sources or [])
+    paths = [source.strip() for source in sources.split(",") if source.strip()]
+    if len(paths) > 1 and all(Path(path).expanduser().exists() for path in paths):
+        return paths
+    return [sources]
+
+
+# The loader of the processes parsing inventory sources, see `parse_inventory`
+_parser_loader = None
+
+
+def _init_parser(loader):
+    global _parser_loader  # pylint: disable=global-statement
+    _parser_loader = loader
+
+
+def _parse_sources(inventory_manager):
+    """Parse the sources of `inventory_manager`, returning whether all of them parsed."""
+    parse_source = inventory_manager.parse_source
+    results = []
+    nested = []
+
+    def record(source, cache=False):
+        # directories are parsed by parsing each of their files
+        nested.append(source)
+        try:
+            parsed = parse_source(source, cache=cache)
+        finally:
+            nested.pop()
+        if not nested:
+            results.append(parsed)
+        return parsed
+
+    inventory_manager.parse_source = record
+    try:
+        inventory_manager.parse_sources(cache=True)
+    finally:
+        del inventory_manager.parse_source
+    return all(results)
+
+
+def _parse_source(source):
+    """Return `source` parsed, in the format of `dump_inventory`, as JSON.
+
+    :returns: The JSON, and whether the source parsed
+    """
+    inventory_manager = InventoryManager(
+        loader=_parser_loader,
+        sources=[source],
+        parse=False,
+    )
+    parsed = _parse_sources(inventory_manager)
+    data = json.dumps(
+        dump_inventory(inventory_manager),
+        cls=DistronodeJSONEncoder,
+        preprocess_unsafe=True,
+    )
+    return data, parsed
+
+
+def parse_inventory(loader, sources, workers=1):
+    """Return an InventoryManager of `sources`, parsing up to `workers` at once.
+
+    Each source is parsed in a forked process, as the plugin loaders are not
+    thread-safe, and the results are loaded in the order of `sources`, so
+    that later sources override the vars of the earlier ones as usual.
+    Sources must not depend on each other, unlike the `constructed` plugin
+    which uses the hosts of the previous sources.
+
+    :param loader: The data loader of the inventory manager
+    :param sources: The inventory sources, see `split_sources`
+    :param workers: The maximum number of sources parsed concurrently
+    """
+    return _parse_inventory(loader, sources, workers)[0]
+
+
+def _parse_inventory(loader, sources, workers=1):
+    """Return an InventoryManager of `sources`, and whether all of them parsed.
+
+    See `parse_inventory`.
+    """
+    sources = split_sources(sources)
+    if not workers or workers <= 1 or len(sources) <= 1:
+        inventory_manager = InventoryManager(
+            loader=loader,
+            sources=sources,
+            parse=False,
+        )
+        return inventory_manager, _parse_sources(inventory_manager)
+
+    if loader._vault.secrets:
+        DistronodeJSONDecoder.set_secrets(loader._vault.secrets)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(sources)),
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_parser,
+        initargs=(loader,),
+    ) as executor:
+        parsed = list(executor.map(_parse_source, sources))
+
+    inventory_manager = InventoryManager(loader=loader, sources=sources, parse=False)
+    for data, _ in parsed:
+        load_inventory(inventory_manager, json.loads(data, cls=DistronodeJSONDecoder))
+    return inventory_manager, all(complete for _, complete in parsed)
+
+
+class InventorySnapshot:
+    """Cache the inventory parsed from `sources` on disk, for `ttl` seconds.
+
+    Snapshots are named after a digest of the sources, of the size,
+    modification time and content of the files they point to, and of the
+    distronode version, so that changing any of them parses the sources again.
+    Dynamic inventories depend on more than their files, which `ttl` bounds.
+    """
+
+    def __init__(self, sources, directory, ttl, workers=1) -> None:
+        """Initialize the snapshot.
+
+        :param sources: The inventory sources, see `split_sources`
+        :param directory: The directory holding the snapshots
+        :param ttl: The number of seconds a snapshot is used for
+        :param workers: The maximum number of sources parsed concurrently
+        """
+        self.sources = split_sources(sources)
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.workers = workers
+        self.path = self.directory / f"{self.key()}.json"
+
+    def key(self):
+        """Return the digest identifying the inventory sources and distronode version."""
+        digest = hashlib.sha256(distronode.__version__.encode())
+        for source in self.sources:
+            digest.update(b"\0" + source.encode())
+            path = Path(source).expanduser().resolve()
+            if path.is_dir():
+                for file in sorted(path.rglob("*")):
+                    if file.is_file():
+                        self._update(digest, file)
+            elif path.exists():
+                self._update(digest, path)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _update(digest, path):
+        stat = path.stat()
+        digest.update(f"\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+    def load(self, loader):
+        """Return an InventoryManager populated from the snapshot, None if missing or expired."""
+        try:
+            if time.time() - self.path.stat().st_mtime > self.ttl:
+                return None
+            if loader._vault.secrets:
+                DistronodeJSONDecoder.set_secrets(loader._vault.secrets)
+            with self.path.open(encoding="utf-8") as file:
+                data = json.load(file, cls=DistronodeJSONDecoder)
+        except (OSError, ValueError):
+            return None
+
+        inventory_manager = InventoryManager(
+            loader=loader,
+            sources=self.sources,
+            parse=False,
+        )
+        load_inventory(inventory_manager, data)
+        return inventory_manager
+
+    def save(self, inventory_manager):
+        """Write the snapshot of `inventory_manager`, atomically."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        path = Path(path)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(
+                    dump_inventory(inventory_manager),
+                    file,
+                    cls=DistronodeJSONEncoder,
+                    preprocess_unsafe=True,
+                )
+            path.replace(self.path)
+        except BaseException:
+            path.unlink()
+            raise
+
+    def inventory_manager(self, loader):
+        """Return an InventoryManager loaded from the snapshot, parsing the sources when needed.
+
+        The snapshot is only saved when every source parsed, so that a
+        dynamic inventory failing once is run again by the next host manager.
+        """
+        inventory_manager = self.load(loader)
+        if inventory_manager is None:
+            inventory_manager, complete = _parse_inventory(
+                loader,
+                self.sources,
+                self.workers,
+            )
+            if complete:
+                self.save(inventory_manager)
+        return inventory_manager
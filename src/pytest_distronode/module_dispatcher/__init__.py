@@ -1,8 +1,155 @@
 """Define BaseModuleDispatcher class."""
 
+import asyncio
+
 from collections.abc import Sequence
 
-from pytest_distronode.errors import DistronodeModuleError
+import distronode.errors
+
+from pytest_distronode.errors import DistronodeModuleError, DistronodeNoHostsMatch
+from pytest_distronode.results import AdHocResult
+
+
+DEFAULT_ASYNC_LIMIT = 4
+
+
+class ModuleBatch:
+    """Queue module calls and run them as a single multi-task play.
+
+    Calls made on the batch are validated and queued; when the ``with`` block
+    exits, they are executed in order and the batch holds one `AdHocResult`
+    per queued call.
+    """
+
+    def __init__(self, dispatcher) -> None:
+        """Initialize an empty batch for the provided `dispatcher`."""
+        self.dispatcher = dispatcher
+        self.calls = []
+        self.results = []
+
+    def __enter__(self):
+        """Start queueing module calls."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Run the queued module calls, unless the block raised."""
+        if exc_type is None and self.calls:
+            self.results = self.dispatcher._run_batch(self.calls)
+
+    def __getattr__(self, name):
+        """Return a function queueing a call to the distronode module matching `name`.
+
+        Raise `DistronodeModuleError` when no such module exists.
+        """
+        if not self.dispatcher.has_module(name):
+            msg = f"The module {name} was not found in configured module paths."
+            raise DistronodeModuleError(
+                msg,
+            )
+
+        def queue(*module_args, **complex_args):
+            self.calls.append((name, module_args, complex_args))
+            return len(self.calls) - 1
+
+        return queue
+
+    def __len__(self) -> int:
+        """Return the number of results."""
+        return len(self.results)
+
+    def __getitem__(self, index):
+        """Return the AdHocResult of the queued call at `index`."""
+        return self.results[index]
+
+    def __iter__(self):
+        """Return an iterator of the AdHocResult of each queued call."""
+        return iter(self.results)
+
+
+class ModuleStream:
+    """Run module calls, handing out each host result as soon as it arrives.
+
+    Calling a module on the stream returns an iterator of
+    ``(host, ModuleResult)`` tuples, in the order hosts answer. Unreachable
+    hosts are yielded too, with `ModuleResult.is_unreachable` set, rather than
+    raising once every host answered. Leaving the iteration early stops the
+    remaining hosts.
+
+    With an `on_result` callback, the call instead passes each tuple to the
+    callback and returns an `AdHocResult` of the contacted hosts.
+    """
+
+    def __init__(self, dispatcher, on_result=None) -> None:
+        """Initialize the stream for the provided `dispatcher`."""
+        self.dispatcher = dispatcher
+        self.on_result = on_result
+
+    def __getattr__(self, name):
+        """Return a function streaming a call to the distronode module matching `name`.
+
+        Raise `DistronodeModuleError` when no such module exists.
+        """
+        if not self.dispatcher.has_module(name):
+            msg = f"The module {name} was not found in configured module paths."
+            raise DistronodeModuleError(
+                msg,
+            )
+
+        def stream(*module_args, **complex_args):
+            results = self.dispatcher._stream(name, module_args, complex_args)
+            if self.on_result is None:
+                return results
+            contacted = {}
+            for host, result in results:
+                if not result.is_unreachable:
+                    contacted[host] = result
+                self.on_result(host, result)
+            return AdHocResult(contacted=contacted)
+
+        return stream
+
+
+class AsyncModuleDispatcher:
+    """Run module calls as coroutines, so that independent calls run concurrently.
+
+    Awaiting a module call returns the usual `AdHocResult`. At most
+    `async_limit` calls of a host manager run at the same time in an event
+    loop, the others wait for their turn.
+    """
+
+    def __init__(self, dispatcher) -> None:
+        """Initialize the view for the provided `dispatcher`."""
+        self.dispatcher = dispatcher
+
+    def _semaphore(self):
+        """Return the semaphore limiting the calls running in the current event loop."""
+        loop = asyncio.get_running_loop()
+        semaphores = self.dispatcher.options["async_semaphores"]
+        if loop not in semaphores:
+            limit = self.dispatcher.options.get("async_limit") or DEFAULT_ASYNC_LIMIT
+            semaphores[loop] = asyncio.Semaphore(limit)
+        return semaphores[loop]
+
+    def __getattr__(self, name):
+        """Return a coroutine function calling the distronode module matching `name`.
+
+        Raise `DistronodeModuleError` when no such module exists.
+        """
+        if not self.dispatcher.has_module(name):
+            msg = f"The module {name} was not found in configured module paths."
+            raise DistronodeModuleError(
+                msg,
+            )
+
+        async def run(*module_args, **complex_args):
+            async with self._semaphore():
+                return await self.dispatcher._run_async(
+                    name,
+                    module_args,
+                    complex_args,
+                )
+
+        return run
 
 
 class BaseModuleDispatcher:
@@ -20,12 +167,19 @@ class BaseModuleDispatcher:
     def __len__(self) -> int:
         """Return the number of hosts that match the `host_pattern`."""
         return len(
-            self.options["inventory_manager"].list_hosts(self.options["host_pattern"]),
+            self.options["inventory_index"].hosts(
+                self.options["host_pattern"],
+                subset=self.options.get("subset"),
+            )[0],
         )
 
     def __contains__(self, item) -> bool:
         """Return the whether the inventory contains a host matching the provided `item`."""
-        return len(self.options["inventory_manager"].list_hosts(item)) > 0
+        hosts = self.options["inventory_index"].hosts(
+            item,
+            subset=self.options.get("subset"),
+        )[0]
+        return len(hosts) > 0
 
     def __getattr__(self, name):
         """Run the distronode module matching the provided `name`.
@@ -40,6 +194,40 @@ class BaseModuleDispatcher:
         self.options["module_name"] = name
         return self._run
 
+    def batch(self):
+        """Return a context manager running the module calls it queues as one play."""
+        return ModuleBatch(self)
+
+    @property
+    def async_(self):
+        """Return a view running module calls as coroutines."""
+        return AsyncModuleDispatcher(self)
+
+    def stream(self, on_result=None):
+        """Return a view running module calls which hands out host results as they arrive."""
+        return ModuleStream(self, on_result=on_result)
+
+    @property
+    def vars(self):  # noqa: A003
+        """Return the variables of the host matching `host_pattern`, without running any module.
+
+        Raise `DistronodeNoHostsMatch` when no host matches, and `DistronodeError`
+        when several do, see `BaseHostManager.query_vars` instead.
+        """
+        pattern = self.options["host_pattern"]
+        hosts, extra_hosts = self.options["inventory_index"].hosts(
+            pattern,
+            subset=self.options.get("subset"),
+        )
+        names = hosts + extra_hosts
+        if not names:
+            msg = f"No host matches the pattern '{pattern}'."
+            raise DistronodeNoHostsMatch(msg)
+        if len(names) > 1:
+            msg = f"The pattern '{pattern}' matches {len(names)} hosts, use query_vars."
+            raise distronode.errors.DistronodeError(msg)
+        return self.options["vars_index"].vars(names[0])
+
     def check_required_kwargs(self, **kwargs):
         """Raise a TypeError if any required kwargs are missing."""
         for kwarg in self.required_kwargs:
@@ -56,3 +244,18 @@ class BaseModuleDispatcher:
         """Raise a runtime error, unless implemented by sub-classes."""
         msg = "Must be implemented by a sub-class"
         raise RuntimeError(msg)
+
+    def _run_batch(self, calls):
+        """Raise a runtime error, unless implemented by sub-classes."""
+        msg = "Must be implemented by a sub-class"
+        raise RuntimeError(msg)
+
+    def _stream(self, module_name, module_args, complex_args):
+        """Raise a runtime error, unless implemented by sub-classes."""
+        msg = "Must be implemented by a sub-class"
+        raise RuntimeError(msg)
+
+    async def _run_async(self, module_name, module_args, complex_args):
+        """Raise a runtime error, unless implemented by sub-classes."""
+        msg = "Must be implemented by a sub-class"
+        raise RuntimeError(msg)
@@ -1,4 +1,7 @@
 """Fixme."""
+import asyncio
+import collections
+import multiprocessing.connection
 import sys
 import warnings
 
@@ -6,17 +9,29 @@ import distronode.constants
 import distronode.errors
 import distronode.utils
 
+from distronode import context
 from distronode.cli.adhoc import AdHocCLI
 from distronode.constants import COLLECTIONS_PATHS
-from distronode.executor.task_queue_manager import TaskQueueManager
 from distronode.playbook.play import Play
 from distronode.plugins.callback import CallbackBase
 from distronode.plugins.loader import module_loader
+from distronode.utils.collection_loader import DistronodeCollectionConfig
 
 from pytest_distronode.errors import DistronodeConnectionFailure
 from pytest_distronode.has_version import has_distronode_v213
 from pytest_distronode.module_dispatcher.v2 import ModuleDispatcherV2
-from pytest_distronode.results import AdHocResult
+from pytest_distronode.results import (
+    AdHocResult,
+    ModuleResult,
+    ResultInterner,
+    ResultStore,
+    project_result,
+    result_status,
+)
+from pytest_distronode.units import (  # pylint: disable=unused-import
+    HAS_CUSTOM_LOADER_SUPPORT,  # noqa: F401, kept importable from here
+    ensure_plugin_loader,
+)
 
 
 # pylint: disable=ungrouped-imports, wrong-import-position
@@ -25,45 +40,151 @@ if not has_distronode_v213:
     raise ImportError(msg)
 
 
-HAS_CUSTOM_LOADER_SUPPORT = True
+class ModuleIndex:
+    """Session-wide index of the modules found by distronode's module loader.
+
+    Module directories are registered with the loader only once, and both
+    found and missing module names are cached. Registering a new directory
+    forgets the missing names, and the whole index is dropped whenever a new
+    collection finder is installed, for example by `units.acf_inject`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.paths = set()
+        self.modules = {}
+        self._collection_finder = None
+
+    def add_paths(self, paths):
+        """Register the module directories in `paths` with the module loader."""
+        if paths is None:
+            return
+        if not isinstance(paths, (list, tuple, set)):
+            paths = [paths]
+        for path in paths:
+            if path in self.paths:
+                continue
+            module_loader.add_directory(path)
+            self.paths.add(path)
+            # a name which was missing may be provided by the new directory
+            self.modules = {
+                name: found for name, found in self.modules.items() if found
+            }
+
+    def has_module(self, name):
+        """Return whether the module loader provides the module `name`."""
+        collection_finder = DistronodeCollectionConfig.collection_finder
+        if collection_finder is not self._collection_finder:
+            self.modules = {}
+            self._collection_finder = collection_finder
+        try:
+            return self.modules[name]
+        except KeyError:
+            found = self.modules[name] = module_loader.has_plugin(name)
+            return found
+
 
-try:
-    # init_plugin_loader was introduced in Distronode-core change here, v2.15
-    # https://github.com/distronode/distronode/pull/78915
-    # Whenever a new vXYZ.py dispatcher module is introduced, make this static import
-    # pylint: disable=ungrouped-imports
-    from distronode.plugins.loader import init_plugin_loader
-except ImportError:
-    HAS_CUSTOM_LOADER_SUPPORT = False
+MODULE_INDEX = ModuleIndex()
 
 
-class ResultAccumulator(CallbackBase):
+def _changes_inventory(result):
+    """Return whether `result` is the result of an add_host or group_by task."""
+    items = result.get("results")
+    if not isinstance(items, list):
+        items = [result]
+    return any(
+        isinstance(item, dict) and ("add_host" in item or "add_group" in item)
+        for item in items
+    )
+
+
+class ResultAccumulator(CallbackBase):  # pylint: disable=too-many-instance-attributes
     """Fixme."""
 
-    def __init__(self, *args, **kwargs) -> None:
-        """Initialize object."""
+    def __init__(
+        self,
+        *args,
+        on_result=None,
+        intern=False,
+        budget=None,
+        projections=None,
+        **kwargs,
+    ) -> None:
+        """Initialize object.
+
+        `on_result`, when provided, is called with the host name and result of
+        every host, as soon as it is received. With `intern`, equal results
+        and parts of results share the same objects, see `ResultInterner`.
+        With a `budget`, in bytes, the results past it are spilled to disk,
+        see `ResultStore`. `projections` maps task uuids to the `keep` and
+        `drop` keys their results are reduced to, see `project_result`.
+        """
         super().__init__(*args, **kwargs)
+        self.on_result = on_result
+        self.interner = ResultInterner() if intern else None
+        self.store = ResultStore(budget) if budget else None
+        self.projections = projections or {}
         self.contacted = {}
         self.unreachable = {}
+        # results keyed by task uuid, then host, for multi-task plays
+        self.task_contacted = {}
+        # the status of the results, see `result_status`, keyed likewise
+        self.task_status = {}
+        # whether an add_host or group_by task changed the inventory
+        self.changed_inventory = False
+
+    def _contact(self, result, payload):
+        host = result._host.get_name()
+        if _changes_inventory(payload):
+            self.changed_inventory = True
+        projection = self.projections.get(result._task._uuid)
+        if projection is not None:
+            payload = project_result(payload, *projection)
+        if self.interner is not None:
+            payload = self.interner.intern(payload)
+        self.task_status.setdefault(result._task._uuid, {})[host] = result_status(
+            payload,
+        )
+        if self.store is not None:
+            payload = self.store.store(payload)
+        self.contacted[host] = payload
+        self.task_contacted.setdefault(result._task._uuid, {})[host] = payload
+        if self.on_result is not None:
+            self.on_result(host, payload)
 
     def v2_runner_on_failed(self, result, *args, **kwargs):
         """Fixme."""
         result2 = {"failed": True}
         result2.update(result._result)
-        self.contacted[result._host.get_name()] = result2
+        self._contact(result, result2)
 
     def v2_runner_on_ok(self, result):
         """Fixme."""
-        self.contacted[result._host.get_name()] = result._result
+        self._contact(result, result._result)
 
     def v2_runner_on_unreachable(self, result):
         """Fixme."""
         self.unreachable[result._host.get_name()] = result._result
+        if self.on_result is not None:
+            result2 = {"unreachable": True}
+            result2.update(result._result)
+            self.on_result(result._host.get_name(), result2)
 
     @property
     def results(self):
         """Fixme."""
-        return {"contacted": self.contacted, "unreachable": self.unreachable}
+        return {
+            "contacted": self.contacted,
+            "unreachable": self.unreachable,
+            "task_contacted": self.task_contacted,
+            "task_status": self.task_status,
+            "changed_inventory": self.changed_inventory,
+        }
+
+
+def _set_readable(future):
+    if not future.done():
+        future.set_result(None)
 
 
 class ModuleDispatcherV213(ModuleDispatcherV2):
@@ -77,62 +198,32 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
         "loader",
     )
 
+    # distronode's CLI context is global, so is the key it was parsed from
+    _context_key = None
+    _context = None
+
     def has_module(self, name):
         """Fixme."""
         # Make sure we parse module_path and pass it to the loader,
         # otherwise, only built-in modules will work.
         if "module_path" in self.options:
-            paths = self.options["module_path"]
-            if isinstance(paths, (list, tuple, set)):
-                for path in paths:
-                    module_loader.add_directory(path)
-            else:
-                module_loader.add_directory(paths)
+            MODULE_INDEX.add_paths(self.options["module_path"])
 
-        return module_loader.has_plugin(name)
-
-    def _run(self, *module_args, **complex_args):
-        """Execute an distronode adhoc command returning the result in a AdhocResult object."""
-        # Assemble module argument string
-        if module_args:
-            complex_args.update({"_raw_params": " ".join(module_args)})
-
-        # Assert hosts matching the provided pattern exist
-        hosts = self.options["inventory_manager"].list_hosts()
-        if "extra_inventory_manager" in self.options:
-            extra_hosts = self.options["extra_inventory_manager"].list_hosts()
-        else:
-            extra_hosts = []
-        no_hosts = False
-        if len(hosts + extra_hosts) == 0:
-            no_hosts = True
-            warnings.warn("provided hosts list is empty, only localhost is available")
+        return MODULE_INDEX.has_module(name)
 
-        self.options["inventory_manager"].subset(self.options.get("subset"))
-        hosts = self.options["inventory_manager"].list_hosts(
-            self.options["host_pattern"],
-        )
-        if "extra_inventory_manager" in self.options:
-            self.options["extra_inventory_manager"].subset(self.options.get("subset"))
-            extra_hosts = self.options["extra_inventory_manager"].list_hosts()
-        else:
-            extra_hosts = []
-        if len(hosts + extra_hosts) == 0 and not no_hosts:
-            msg = "Specified hosts and/or --limit does not match any hosts."
-            raise distronode.errors.DistronodeError(
-                msg,
-            )
+    def _load_context(self):
+        """Save the CLI options into distronode's global context, returning their key.
 
+        Parsing only happens when the effective options differ from the ones
+        the current global context was parsed from.
+        """
         # Pass along cli options
-        args = ["pytest-distronode"]
         verbosity = None
         for verbosity_syntax in ("-v", "-vv", "-vvv", "-vvvv", "-vvvvv"):
             if verbosity_syntax in sys.argv:
                 verbosity = verbosity_syntax
                 break
-        if verbosity is not None:
-            args.append(verbosity_syntax)
-        args.extend([self.options["host_pattern"]])
+        cli_options = []
         for argument in (
             "connection",
             "user",
@@ -148,9 +239,22 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
                 continue
 
             if arg_value is True:
-                args.append(f"--{argument}")
+                cli_options.append(f"--{argument}")
             else:
-                args.append(f"--{argument}={arg_value}")
+                cli_options.append(f"--{argument}={arg_value}")
+
+        context_key = (verbosity, *cli_options)
+        cls = ModuleDispatcherV213
+        if context_key == cls._context_key and context.CLIARGS is cls._context:
+            return context_key
+
+        # The host pattern is a required positional argument, but plays are
+        # built from `host_pattern` directly, so a placeholder keeps the
+        # context independent of it
+        args = ["pytest-distronode"]
+        if verbosity is not None:
+            args.append(verbosity)
+        args.extend(["all", *cli_options])
 
         # Use Distronode's own adhoc cli to parse the fake command line we created and then save it
         # into Distronode's global context
@@ -160,46 +264,102 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
         # And now we'll never speak of this again
         del adhoc
 
-        # Initialize callbacks to capture module JSON responses
-        callback = ResultAccumulator()
-
-        kwargs = {
-            "inventory": self.options["inventory_manager"],
-            "variable_manager": self.options["variable_manager"],
-            "loader": self.options["loader"],
-            "stdout_callback": callback,
-            "passwords": {"conn_pass": None, "become_pass": None},
+        cls._context_key = context_key
+        cls._context = context.CLIARGS
+        return context_key
+
+    @staticmethod
+    def _task(module_name, module_args, complex_args):
+        """Return the task datastructure calling `module_name`."""
+        # Assemble module argument string
+        if module_args:
+            complex_args.update({"_raw_params": " ".join(module_args)})
+        return {"action": {"module": module_name, "args": complex_args}}
+
+    @staticmethod
+    def _task_uuids(play):
+        """Return the uuid of each task of `play`, in order."""
+        uuids = []
+        for task in play.get_tasks():
+            if isinstance(task, list):
+                uuids.extend(t._uuid for t in task)
+            else:
+                uuids.append(task._uuid)
+        return uuids
+
+    def _projection(self, complex_args):
+        """Pop the `_keep` and `_drop` keys of a call from `complex_args`.
+
+        :returns: The keys the results of the call are reduced to, and the
+            keys removed from them, defaulting to the `keep` and `drop` options
+        """
+        keep = complex_args.pop("_keep", self.options.get("keep"))
+        drop = complex_args.pop("_drop", self.options.get("drop"))
+        return keep, drop
+
+    def _projections(self, play, projections):
+        """Return the projection of each task of `play`, keyed by task uuid."""
+        return {
+            uuid: projection
+            for uuid, projection in zip(self._task_uuids(play), projections)
+            if projection != (None, None)
         }
 
-        kwargs_extra = {}
-        # If we have an extra inventory, do the same that we did for the inventory
-        if "extra_inventory_manager" in self.options:
-            callback_extra = ResultAccumulator()
-
-            kwargs_extra = {
-                "inventory": self.options["extra_inventory_manager"],
-                "variable_manager": self.options["extra_variable_manager"],
-                "loader": self.options["extra_loader"],
-                "stdout_callback": callback_extra,
-                "passwords": {"conn_pass": None, "become_pass": None},
-            }
+    def _run(self, *module_args, **complex_args):
+        """Execute an distronode adhoc command returning the result in a AdhocResult object."""
+        projection = self._projection(complex_args)
+        task = self._task(self.options["module_name"], module_args, complex_args)
+        return self._execute([task], [projection])[0]
+
+    def _run_batch(self, calls):
+        """Execute the queued `calls` as a single play, returning one AdHocResult per call."""
+        tasks = []
+        projections = []
+        for module_name, module_args, complex_args in calls:
+            projections.append(self._projection(complex_args))
+            task = self._task(module_name, module_args, complex_args)
+            # a failing call must not prevent the following ones from running
+            task["ignore_errors"] = True
+            tasks.append(task)
+        return self._execute(tasks, projections)
+
+    def _load_plays(self, tasks):
+        """Load the pseudo-play running `tasks` for the inventory and the extra one.
+
+        :returns: The key of the CLI context, the play, and the play for the
+            extra inventory or None
+        """
+        # Assert hosts matching the provided pattern exist
+        index = self.options["inventory_index"]
+        no_hosts = False
+        if index.count() == 0:
+            no_hosts = True
+            warnings.warn("provided hosts list is empty, only localhost is available")
 
-        # create a pseudo-play to execute the specified module via a single task
+        hosts, extra_hosts = index.hosts(
+            self.options["host_pattern"],
+            subset=self.options.get("subset"),
+        )
+        if len(hosts + extra_hosts) == 0 and not no_hosts:
+            msg = "Specified hosts and/or --limit does not match any hosts."
+            raise distronode.errors.DistronodeError(
+                msg,
+            )
+
+        context_key = self._load_context()
+
+        # create a pseudo-play to execute the specified modules, one task each
         play_ds = {
             "name": "pytest-distronode",
             "hosts": self.options["host_pattern"],
             "become": self.options.get("become"),
             "become_user": self.options.get("become_user"),
             "gather_facts": "no",
-            "tasks": [
-                {
-                    "action": {
-                        "module": self.options["module_name"],
-                        "args": complex_args,
-                    },
-                },
-            ],
+            "tasks": tasks,
         }
+        for keyword in ("strategy", "serial", "max_fail_percentage"):
+            if self.options.get(keyword) is not None:
+                play_ds[keyword] = self.options[keyword]
 
         play = Play().load(
             play_ds,
@@ -214,28 +374,193 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
                 loader=self.options["extra_loader"],
             )
 
-        if HAS_CUSTOM_LOADER_SUPPORT:
-            # Load the collection finder, unsupported, may change in future
-            init_plugin_loader(COLLECTIONS_PATHS)
+        # Load the collection finder once, unsupported, may change in future
+        ensure_plugin_loader(COLLECTIONS_PATHS)
+
+        return context_key, play, play_extra
+
+    def _callback(self, play, projections, on_result=None):
+        """Return a new callback accumulating the results of `play`.
 
-        # now create a task queue manager to execute the play
-        tqm = None
+        :param play: The play the callback receives the results of
+        :param projections: The projection of the results of each task of
+            `play`, see `_projection`
+        :param on_result: The function called with every host result
+        """
+        return ResultAccumulator(
+            on_result=on_result,
+            projections=self._projections(play, projections),
+            intern=self.options.get("intern_results", False),
+            budget=(self.options.get("result_budget") or 0) * 1024 * 1024,
+        )
+
+    def _stream(self, module_name, module_args, complex_args):
+        """Execute an distronode adhoc command, yielding each host result as it arrives."""
+        projections = [self._projection(complex_args)]
+        task = self._task(module_name, module_args, complex_args)
+        context_key, play, play_extra = self._load_plays([task])
+
+        events = collections.deque()
+
+        def on_result(host, result):
+            events.append((host, ModuleResult(result)))
+
+        # run the plays in forked processes, which send every host result
+        # back as soon as the callback receives it
+        callbacks = [self._callback(play, projections, on_result=on_result)]
+        runs = [
+            self.options["engine"].start(
+                play,
+                callbacks[0],
+                key=context_key,
+                forks=self.options.get("forks"),
+            ),
+        ]
+        if play_extra is not None:
+            callbacks.append(
+                self._callback(play_extra, projections, on_result=on_result),
+            )
+            runs.append(
+                self.options["extra_engine"].start(
+                    play_extra,
+                    callbacks[1],
+                    key=context_key,
+                    forks=self.options.get("forks"),
+                ),
+            )
+
+        # the caller may stop iterating at any time, which stops the plays
         try:
-            tqm = TaskQueueManager(**kwargs)
-            tqm.run(play)
+            while not all(run.done for run in runs):
+                ready = multiprocessing.connection.wait(
+                    [run.connection for run in runs if not run.done],
+                )
+                for run in runs:
+                    if not run.done and run.connection in ready:
+                        run.receive()
+                while events:
+                    yield events.popleft()
+            for run in runs:
+                run.wait()
         finally:
-            if tqm:
-                tqm.cleanup()
+            for run in runs:
+                run.terminate()
+            self._forget_changes(*callbacks)
 
-        if "extra_inventory_manager" in self.options:
-            tqm_extra = None
+    def _execute(self, tasks, projections):
+        """Run `tasks` in a pseudo-play, returning one AdHocResult per task.
+
+        The results of each task are reduced to its projection in `projections`.
+        """
+        context_key, play, play_extra = self._load_plays(tasks)
+
+        # Initialize callbacks to capture module JSON responses
+        callback = self._callback(play, projections)
+
+        # If we have an extra inventory, do the same that we did for the inventory
+        callback_extra = None
+        if play_extra is not None:
+            callback_extra = self._callback(play_extra, projections)
+
+        # run the play on the host manager's engines, which keep their task
+        # queue managers warm for as long as the CLI context is unchanged
+        if play_extra is not None:
+            # run the extra inventory concurrently, in a forked process
+            run_extra = self.options["extra_engine"].start(
+                play_extra,
+                callback_extra,
+                key=context_key,
+                forks=self.options.get("forks"),
+            )
             try:
-                tqm_extra = TaskQueueManager(**kwargs_extra)
-                tqm_extra.run(play_extra)
+                self.options["engine"].run(
+                    play,
+                    callback,
+                    key=context_key,
+                    forks=self.options.get("forks"),
+                )
             finally:
-                if tqm_extra:
-                    tqm_extra.cleanup()
+                run_extra.wait()
+        else:
+            self.options["engine"].run(
+                play,
+                callback,
+                key=context_key,
+                forks=self.options.get("forks"),
+            )
+
+        return self._results(play, callback, play_extra, callback_extra)
+
+    async def _run_async(self, module_name, module_args, complex_args):
+        """Execute an distronode adhoc command without blocking the event loop."""
+        projections = [self._projection(complex_args)]
+        task = self._task(module_name, module_args, complex_args)
+        context_key, play, play_extra = self._load_plays([task])
+
+        callback = self._callback(play, projections)
+        callback_extra = None
+        runs = [
+            self.options["engine"].start(
+                play,
+                callback,
+                key=context_key,
+                forks=self.options.get("forks"),
+            ),
+        ]
+        if play_extra is not None:
+            callback_extra = self._callback(play_extra, projections)
+            runs.append(
+                self.options["extra_engine"].start(
+                    play_extra,
+                    callback_extra,
+                    key=context_key,
+                    forks=self.options.get("forks"),
+                ),
+            )
 
+        # the plays run in forked processes, wait for their pipes to be readable
+        loop = asyncio.get_running_loop()
+        try:
+            for run in runs:
+                while not run.done:
+                    readable = loop.create_future()
+                    fileno = run.connection.fileno()
+                    loop.add_reader(fileno, _set_readable, readable)
+                    try:
+                        await readable
+                    finally:
+                        loop.remove_reader(fileno)
+                    run.receive()
+                run.wait()
+        finally:
+            for run in runs:
+                run.terminate()
+
+        return self._results(play, callback, play_extra, callback_extra)[0]
+
+    def _forget_changes(self, *callbacks):
+        """Forget the cached variables and hosts the plays of `callbacks` changed.
+
+        Module calls such as `setup` or `set_fact` change the facts of the
+        hosts, which are part of their variables, see `VarsIndex`, while
+        `add_host` or `group_by` change the inventory, see `InventoryIndex`.
+        """
+        callbacks = [callback for callback in callbacks if callback is not None]
+        if any(callback.changed_inventory for callback in callbacks):
+            # the `groups` of every host may have changed
+            self.options["inventory_index"].invalidate()
+            names = None
+        else:
+            names = set()
+            for callback in callbacks:
+                names.update(callback.contacted)
+        vars_index = self.options.get("vars_index")
+        if vars_index is not None:
+            vars_index.invalidate(names)
+
+    def _results(self, play, callback, play_extra=None, callback_extra=None):
+        """Return one AdHocResult per task of `play`, from the results of the callbacks."""
+        self._forget_changes(callback, callback_extra)
         # Raise exception if host(s) unreachable
         if callback.unreachable:
             msg = "Host unreachable in the inventory"
@@ -244,7 +569,7 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
                 dark=callback.unreachable,
                 contacted=callback.contacted,
             )
-        if "extra_inventory_manager" in self.options and callback_extra.unreachable:
+        if play_extra is not None and callback_extra.unreachable:
             msg = "Host unreachable in the extra inventory"
             raise DistronodeConnectionFailure(
                 msg,
@@ -253,10 +578,20 @@ class ModuleDispatcherV213(ModuleDispatcherV2):
             )
 
         # Success!
-        return AdHocResult(
-            contacted=(
-                {**callback.contacted, **callback_extra.contacted}
-                if "extra_inventory_manager" in self.options
-                else callback.contacted
-            ),
-        )
+        results = []
+        uuids = self._task_uuids(play)
+        extra_uuids = self._task_uuids(play_extra) if play_extra else []
+        for index, uuid in enumerate(uuids):
+            contacted = callback.task_contacted.get(uuid, {})
+            status = callback.task_status.get(uuid, {})
+            if extra_uuids:
+                contacted = {
+                    **contacted,
+                    **callback_extra.task_contacted.get(extra_uuids[index], {}),
+                }
+                status = {
+                    **status,
+                    **callback_extra.task_status.get(extra_uuids[index], {}),
+                }
+            results.append(AdHocResult(contacted=contacted, status=status))
+        return results
@@ -16,11 +16,17 @@ import pytest
 
 from pytest_distronode.fixtures import (
     distronode_adhoc,
+    distronode_adhoc_async,
     distronode_facts,
     distronode_module,
+    distronode_module_async,
     localhost,
 )
-from pytest_distronode.host_manager import get_host_manager
+from pytest_distronode.host_manager import (
+    DEFAULT_POOL_SIZE,
+    HostHandle,
+    HostManagerPool,
+)
 
 from .molecule import HAS_MOLECULE, MoleculeFile, MoleculeScenario
 from .units import inject, inject_only
@@ -35,7 +41,14 @@ logger = logging.getLogger(__name__)
 
 # Silence linters for imported fixtures
 # pylint: disable=pointless-statement, no-member
-(distronode_adhoc, distronode_module, distronode_facts, localhost)
+(
+    distronode_adhoc,
+    distronode_adhoc_async,
+    distronode_module,
+    distronode_module_async,
+    distronode_facts,
+    localhost,
+)
 
 log_map = {
     0: logging.CRITICAL,
@@ -44,7 +57,13 @@ log_map = {
     3: logging.INFO,
     4: logging.DEBUG,
 }
-OUR_FIXTURES = ("distronode_adhoc", "distronode_module", "distronode_facts")
+OUR_FIXTURES = (
+    "distronode_adhoc",
+    "distronode_adhoc_async",
+    "distronode_module",
+    "distronode_module_async",
+    "distronode_facts",
+)
 
 
 def pytest_addoption(parser):
@@ -68,6 +87,13 @@ def pytest_addoption(parser):
         metavar="DISTRONODE_EXTRA_INVENTORY",
         help="distronode extra inventory file URI (default: %(default)s)",
     )
+    group.addoption(
+        "--distronode-merge-extra-inventory",
+        action="store_true",
+        dest="distronode_merge_extra_inventory",
+        default=False,
+        help="load the extra inventory into the same inventory as --inventory (default: %(default)s)",
+    )
     group.addoption(
         "--host-pattern",
         "--distronode-host-pattern",
@@ -153,6 +179,86 @@ def pytest_addoption(parser):
         default=distronode.constants.DEFAULT_BECOME_ASK_PASS,
         help="ask for privilege escalation password (default: %(default)s)",
     )
+    group.addoption(
+        "--distronode-forks",
+        action="store",
+        dest="distronode_forks",
+        type=int,
+        default=None,
+        help="number of parallel processes to use (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-strategy",
+        action="store",
+        dest="distronode_strategy",
+        choices=("linear", "free", "host_pinned"),
+        default=None,
+        help="strategy of the plays running modules (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-serial",
+        action="store",
+        dest="distronode_serial",
+        default=None,
+        help="number or percentage of hosts to run modules on per batch (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-max-fail-percentage",
+        action="store",
+        dest="distronode_max_fail_percentage",
+        type=float,
+        default=None,
+        help="abort a batch once this percentage of hosts failed (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-async-limit",
+        action="store",
+        dest="distronode_async_limit",
+        type=int,
+        default=None,
+        help="number of async module calls running concurrently (default: 4)",
+    )
+    group.addoption(
+        "--distronode-pool-size",
+        action="store",
+        dest="distronode_pool_size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="number of initialized host managers reused across tests, 0 to disable (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-inventory-cache",
+        action="store",
+        dest="distronode_inventory_cache",
+        type=int,
+        default=None,
+        metavar="TTL",
+        help="reuse the parsed inventory for TTL seconds, across runs (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-intern-results",
+        action="store_true",
+        dest="distronode_intern_results",
+        default=False,
+        help="share equal module results, and parts of them, between hosts (default: %(default)s)",
+    )
+    group.addoption(
+        "--distronode-result-budget",
+        action="store",
+        dest="distronode_result_budget",
+        type=int,
+        default=None,
+        metavar="MB",
+        help="keep at most MB of the results of a module call in memory, spilling larger results to disk (default: unlimited)",
+    )
+    group.addoption(
+        "--distronode-inventory-workers",
+        action="store",
+        dest="distronode_inventory_workers",
+        type=int,
+        default=None,
+        help="number of independent inventory sources parsed concurrently (default: 1)",
+    )
     group.addoption(
         "--distronode-unit-inject-only",
         action="store_true",
@@ -238,32 +344,32 @@ def pytest_generate_tests(metafunc):
         PyTestDistronodePlugin.assert_required_distronode_parameters(metafunc.config)
         try:
             plugin = metafunc.config.pluginmanager.getplugin("distronode")
-            hosts = plugin.initialize(
-                config=plugin.config,
-                pattern=metafunc.config.getoption("distronode_host_pattern"),
-            )
+            hosts = plugin.collection_host_manager()
         except distronode.errors.DistronodeError as exception:
             raise pytest.UsageError(exception)
 
-        # Return the host name as a string
-        metafunc.parametrize("distronode_host", iter(hosts[h] for h in hosts))
+        # Return a lazily created dispatcher for each host
+        metafunc.parametrize("distronode_host", list(hosts))
 
     if "distronode_group" in metafunc.fixturenames:
         # assert required --distronode-* parameters were used
         PyTestDistronodePlugin.assert_required_distronode_parameters(metafunc.config)
         try:
             plugin = metafunc.config.pluginmanager.getplugin("distronode")
-            hosts = plugin.initialize(
-                config=plugin.config,
-                pattern=metafunc.config.getoption("distronode_host_pattern"),
-            )
+            hosts = plugin.collection_host_manager()
         except distronode.errors.DistronodeError as exception:
             raise pytest.UsageError(exception)
         groups = hosts.options["inventory_manager"].list_groups()
         extra_groups = hosts.get_extra_inventory_groups()
-        # Return the group name as a string
-        metafunc.parametrize("distronode_group", iter(hosts[g] for g in groups))
-        metafunc.parametrize("distronode_group", iter(hosts[g] for g in extra_groups))
+        # Return a lazily created dispatcher for each group
+        metafunc.parametrize(
+            "distronode_group",
+            [HostHandle(hosts, g) for g in groups],
+        )
+        metafunc.parametrize(
+            "distronode_group",
+            [HostHandle(hosts, g) for g in extra_groups],
+        )
 
     if "molecule_scenario" in metafunc.fixturenames:
         if not HAS_MOLECULE:
@@ -318,6 +424,36 @@ class PyTestDistronodePlugin:
     def __init__(self, config) -> None:
         """Initialize plugin."""
         self.config = config
+        self._host_managers = None
+        self._collection_host_manager = None
+
+    @property
+    def host_managers(self):
+        """Return the pool of the host managers initialized during the session."""
+        if self._host_managers is None:
+            self._host_managers = HostManagerPool(
+                size=self.config.getoption("distronode_pool_size"),
+            )
+        return self._host_managers
+
+    def collection_host_manager(self):
+        """Return the host manager parametrizing the `distronode_host` and `distronode_group` tests.
+
+        It is initialized from the command-line options on first use, and
+        shared by every test function collected during the session.
+        """
+        if self._collection_host_manager is None:
+            self._collection_host_manager = self.initialize(
+                config=self.config,
+                pattern=self.config.getoption("distronode_host_pattern"),
+            )
+        return self._collection_host_manager
+
+    def pytest_sessionfinish(self, session):
+        """Tear down the pooled host managers."""
+        self._collection_host_manager = None
+        if self._host_managers is not None:
+            self._host_managers.invalidate()
 
     def pytest_report_header(self):
         """Return the version of distronode."""
@@ -356,6 +492,7 @@ class PyTestDistronodePlugin:
         option_names = [
             "distronode_inventory",
             "distronode_extra_inventory",
+            "distronode_merge_extra_inventory",
             "distronode_host_pattern",
             "distronode_connection",
             "distronode_user",
@@ -365,13 +502,22 @@ class PyTestDistronodePlugin:
             "distronode_become_user",
             "distronode_ask_become_pass",
             "distronode_subset",
+            "distronode_forks",
+            "distronode_strategy",
+            "distronode_serial",
+            "distronode_max_fail_percentage",
+            "distronode_async_limit",
+            "distronode_inventory_cache",
+            "distronode_inventory_workers",
+            "distronode_intern_results",
+            "distronode_result_budget",
         ]
 
         kwargs = {}
 
         # Load command-line supplied values
         for key in option_names:
-            short_key = key[8:]
+            short_key = key[len("distronode_") :]
             kwargs[short_key] = config.getoption(key)
 
         # normalize distronode.distronode_become options
@@ -407,7 +553,14 @@ class PyTestDistronodePlugin:
             distronode_cfg.update(self._load_request_config(request))
         # merge in provided kwargs
         distronode_cfg.update(kwargs)
-        return get_host_manager(**distronode_cfg)
+        # snapshots of parsed inventories are kept in the pytest cache
+        cache = getattr(config, "cache", None)
+        if distronode_cfg.get("inventory_cache") and cache is not None:
+            distronode_cfg.setdefault(
+                "inventory_cache_dir",
+                str(cache.mkdir("distronode_inventory")),
+            )
+        return self.host_managers.get(**distronode_cfg)
 
     @staticmethod
     def assert_required_distronode_parameters(config):
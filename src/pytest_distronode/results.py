@@ -1,68 +1,338 @@
 """Fixme."""
 
+import atexit
+import functools
+import json
+import os
+import shutil
+import sys
+import tempfile
 
-class ModuleResult(dict):
-    """Fixme."""
+from collections.abc import Mapping
+from pathlib import Path
+
+from distronode.module_utils.common.json import DistronodeJSONEncoder
+from distronode.parsing.ajson import DistronodeJSONDecoder
+
+
+# The status of a module result, see `result_status`
+STATUS_FIELDS = ("ok", "changed", "failed", "skipped", "unreachable", "rc")
+
+
+def result_status(payload):
+    """Return the status of the module result `payload`, as a tuple of `STATUS_FIELDS`."""
+    changed = bool(payload.get("changed", False))
+    unreachable = bool(payload.get("unreachable", False))
+    skipped = bool(payload.get("skipped", False))
+    failed = bool(payload.get("failed", False)) or payload.get("rc", 0) != 0
+    ok = not (changed or unreachable or skipped or failed)
+    return (ok, changed, failed, skipped, unreachable, payload.get("rc"))
+
+
+# The keys of a module result its status is computed from, never projected out
+STATUS_KEYS = ("changed", "failed", "skipped", "unreachable", "rc")
+
+
+def project_result(payload, keep=None, drop=None):
+    """Return `payload` with only the keys in `keep`, and without those in `drop`.
+
+    The `STATUS_KEYS` are always kept, so that the status of the projected
+    result is the status of the full one.
+    """
+    if keep is not None:
+        keep = set(keep).union(STATUS_KEYS)
+        payload = {key: value for key, value in payload.items() if key in keep}
+    if drop:
+        drop = set(drop).difference(STATUS_KEYS)
+        payload = {key: value for key, value in payload.items() if key not in drop}
+    return payload
+
+
+# Results smaller than this, in bytes of JSON, are never spilled to disk
+SPILL_THRESHOLD = 64 * 1024
+
+# The directory of the spilled results of this process, see `_spill_directory`
+_spill_directory_path = None
+
+
+def _remove_spill_directory(path, pid):
+    """Remove the spill directory `path`, unless called in a forked process."""
+    if os.getpid() == pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _spill_directory():
+    """Return the directory of the spilled results, removed at exit."""
+    global _spill_directory_path  # pylint: disable=global-statement
+    if _spill_directory_path is None:
+        _spill_directory_path = tempfile.mkdtemp(prefix="pytest-distronode-results-")
+        atexit.register(_remove_spill_directory, _spill_directory_path, os.getpid())
+    return _spill_directory_path
+
+
+@functools.lru_cache(maxsize=16)
+def _load_spilled(path, offset, length):
+    """Return the result written at `offset` of the spill file `path`."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        data = os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
+    return json.loads(data, cls=DistronodeJSONDecoder)
+
+
+class SpilledResult(Mapping):
+    """A module result written to disk by a `ResultStore`.
+
+    The result is read back when one of its keys is accessed, only the few
+    last results read are kept in memory. It pickles as its location, so that
+    a forked process running a play sends it to its parent at no cost.
+    """
+
+    __slots__ = ("path", "offset", "length")
+
+    def __init__(self, path, offset, length) -> None:
+        """Initialize the result written at `offset` of the spill file `path`."""
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    def __reduce__(self):
+        """Pickle the location of the result only."""
+        return (type(self), (self.path, self.offset, self.length))
+
+    def _load(self):
+        return _load_spilled(self.path, self.offset, self.length)
+
+    def __getitem__(self, key):
+        """Return the value of `key` in the result."""
+        return self._load()[key]
+
+    def __iter__(self):
+        """Return an iterator of the keys of the result."""
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        """Return the number of keys of the result."""
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        """Return the representation of the result."""
+        return f"{type(self).__name__}({self.path!r}, {self.offset}, {self.length})"
+
+
+class ResultStore:
+    """Keep the results of a module call within a memory budget.
+
+    Results are kept in memory until their size, as JSON, reaches `budget`
+    bytes. Past it, the results larger than `threshold` bytes are appended to
+    a spill file and replaced by a `SpilledResult`. The spill file is created
+    in a directory of the process building the store, which is removed at
+    exit, so that a store built before forking may be written by the child.
+    """
 
-    def _check_key(self, key):
-        # if 'results' in self:
-        #     for res in self.get('results', []):
-        #         if isinstance(res, dict):
-        return self.get(key, False)
+    def __init__(self, budget, threshold=SPILL_THRESHOLD) -> None:
+        """Initialize the store.
+
+        :param budget: The size, in bytes of JSON, of the results kept in memory
+        :param threshold: The size of the smallest result spilled to disk
+        """
+        self.budget = budget
+        self.threshold = threshold
+        self.size = 0
+        self.spilled = 0
+        self.directory = _spill_directory()
+        self.path = None
+
+    def store(self, payload):
+        """Return `payload`, or a `SpilledResult` of it when over the budget."""
+        try:
+            data = json.dumps(
+                payload,
+                cls=DistronodeJSONEncoder,
+                preprocess_unsafe=True,
+            ).encode()
+        except (TypeError, ValueError):
+            return payload
+        if len(data) < self.threshold or self.size + len(data) <= self.budget:
+            self.size += len(data)
+            return payload
+        if self.path is None:
+            fd, path = tempfile.mkstemp(suffix=".json", dir=self.directory)
+            os.close(fd)
+            self.path = Path(path)
+        with self.path.open("ab") as file:
+            offset = file.tell()
+            file.write(data)
+        self.spilled += 1
+        return SpilledResult(self.path, offset, len(data))
+
+
+class ResultInterner:
+    """Share equal module results, and equal parts of them, between hosts.
+
+    Dicts and lists are replaced by the first equal one interned, and
+    strings are interned, so that the results of many identical hosts only
+    hold their differences. The shared values must not be changed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty interner."""
+        self._values = {}
+
+    def intern(self, value):
+        """Return the first interned value equal to `value`, or `value` rebuilt from interned parts."""
+        return self._intern(value)[0]
+
+    def _intern(self, value):
+        """Return the interned `value` and its key, None when it cannot be interned."""
+        cls = type(value)
+        if cls is dict:
+            items = [
+                (self._intern(name), self._intern(item)) for name, item in value.items()
+            ]
+            value = {name: item for (name, _), (item, _) in items}
+            if any(
+                None in (name_key, item_key) for (_, name_key), (_, item_key) in items
+            ):
+                return value, None
+            # equal dicts with keys in another order are equal too
+            key = (dict, frozenset((name, id(item)) for name, item in value.items()))
+        elif cls is list:
+            items = [self._intern(item) for item in value]
+            value = [item for item, _ in items]
+            if any(key is None for _, key in items):
+                return value, None
+            key = (list, tuple(id(item) for item in value))
+        else:
+            key = (cls, value)
+            try:
+                hash(key)
+            except TypeError:
+                return value, None
+            if cls is str:
+                value = sys.intern(value)
+        return self._values.setdefault(key, value), key
+
+
+class ModuleResult(Mapping):
+    """A read-only view of the result of a module call on a host.
+
+    A single mapping argument is wrapped rather than copied, keyword
+    arguments build the result as `dict` does. The status flags are only
+    computed when first asked for.
+    """
+
+    __slots__ = ("_data", "_flags")
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Wrap the result payload."""
+        if len(args) == 1 and not kwargs and isinstance(args[0], ModuleResult):
+            self._data = args[0]._data
+        elif len(args) == 1 and not kwargs and isinstance(args[0], Mapping):
+            self._data = args[0]
+        else:
+            self._data = dict(*args, **kwargs)
+        self._flags = None
+
+    def __getitem__(self, key):
+        """Return the value of `key` in the result."""
+        return self._data[key]
+
+    def __iter__(self):
+        """Return an iterator of the keys of the result."""
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        """Return the number of keys of the result."""
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        """Return whether the result has `key`."""
+        return key in self._data
+
+    def __repr__(self) -> str:
+        """Return the representation of the result."""
+        return f"{type(self).__name__}({self._data!r})"
+
+    def get(self, key, default=None):
+        """Return the value of `key` in the result, `default` when missing."""
+        return self._data.get(key, default)
+
+    def _flag(self, name):
+        """Return the status flag `name`, computing the status on first use."""
+        if self._flags is None:
+            self._flags = dict(zip(STATUS_FIELDS, result_status(self._data)))
+        return self._flags[name]
 
     @property
     def is_ok(self):
         """Fixme."""
-        return not (
-            self.is_changed or self.is_unreachable or self.is_skipped or self.is_failed
-        )
+        return self._flag("ok")
 
     @property
     def is_changed(self):
         """Fixme."""
-        return self._check_key("changed")
+        return self._flag("changed")
 
     @property
     def is_unreachable(self):
         """Fixme."""
-        return self._check_key("unreachable")
+        return self._flag("unreachable")
 
     @property
     def is_skipped(self):
         """Fixme."""
-        return self._check_key("skipped")
+        return self._flag("skipped")
 
     @property
     def is_failed(self):
         """Fixme."""
-        return self._check_key("failed") or self.get("rc", 0) != 0
+        return self._flag("failed")
 
     @property
     def is_successful(self):
         """Fixme."""
-        return not (self.is_failed or self.is_unreachable)
+        return not (self._flag("failed") or self._flag("unreachable"))
 
 
 class AdHocResult:
     """Fixme."""
 
+    _attributes = ("contacted", "_results", "_status", "_columns")
+
     def __init__(self, **kwargs) -> None:
         """Fixme."""
+        # the ModuleResult view of each host result, created on first access
+        self._results = {}
+        # the status of each host result, see `result_status`, when known
+        # by the result callback, and the status columns built from it
+        self._status = kwargs.get("status") or {}
+        self._columns = None
         required_kwargs = ("contacted",)
         for kwarg in required_kwargs:
             assert kwarg in kwargs, f"Missing required keyword argument '{kwarg}'"
             setattr(self, kwarg, kwargs.get(kwarg))
 
+    def _result(self, host):
+        """Return the ModuleResult view of the result of `host`."""
+        try:
+            return self._results[host]
+        except KeyError:
+            result = self._results[host] = ModuleResult(self.contacted[host])
+            return result
+
     def __getitem__(self, item):
         """Return a ModuleResult instance matching the provided `item`."""
         if item in self.contacted:
-            return ModuleResult(**self.contacted[item])
+            return self._result(item)
         raise KeyError(item)
 
     def __getattr__(self, attr):
         """Return a ModuleResult instance matching the provided `attr`."""
-        if attr in self.contacted:
-            return ModuleResult(**self.contacted[attr])
+        # copies are made without __init__
+        if attr not in AdHocResult._attributes and attr in self.contacted:
+            return self._result(attr)
         msg = f"type AdHocResult has no attribute '{attr}'"
         raise AttributeError(msg)
 
@@ -85,8 +355,118 @@ class AdHocResult:
     def items(self):
         """Return a list of tuples containing the inventory host key, and the ModuleResult instance."""
         for k in self.contacted:
-            yield (k, getattr(self, k))
+            yield (k, self._result(k))
 
     def values(self):
         """Return a list of ModuleResult instances for each contacted inventory host."""
-        return [getattr(self, k) for k in self.contacted]
+        return [self._result(k) for k in self.contacted]
+
+    def columns(self):
+        """Return the status of the contacted hosts as columns.
+
+        :returns: A dict of tuples, the `host` names, then each of the
+            `STATUS_FIELDS`, in the order of the contacted hosts
+        """
+        if self._columns is None:
+            rows = [
+                self._status.get(host) or result_status(payload)
+                for host, payload in self.contacted.items()
+            ]
+            columns = zip(*rows) if rows else [()] * len(STATUS_FIELDS)
+            self._columns = {
+                "host": tuple(self.contacted),
+                **dict(zip(STATUS_FIELDS, (tuple(column) for column in columns))),
+            }
+        return self._columns
+
+    def counts(self):
+        """Return the number of contacted hosts with each status flag."""
+        columns = self.columns()
+        return {field: sum(columns[field]) for field in STATUS_FIELDS if field != "rc"}
+
+    def where(self, **conditions):
+        """Return the contacted hosts whose status matches all `conditions`.
+
+        For example, ``where(changed=True, rc=0)``. Raise `TypeError` for a
+        condition which is not one of `STATUS_FIELDS`.
+        """
+        for field in conditions:
+            if field not in STATUS_FIELDS:
+                msg = f"where() got an unexpected status '{field}'"
+                raise TypeError(msg)
+        columns = self.columns()
+        selected = [(columns[field], value) for field, value in conditions.items()]
+        return [
+            host
+            for index, host in enumerate(columns["host"])
+            if all(column[index] == value for column, value in selected)
+        ]
+
+    def group_by_result(self, *keys):
+        """Return the contacted hosts grouped by equal results.
+
+        :param keys: The keys of the results compared, all when none, for
+            example ``group_by_result("stdout", "rc")``
+        :returns: A list of lists of hosts, in the order of the contacted hosts
+        """
+        interner = ResultInterner()
+        groups = {}
+        # the results which cannot be interned, holding sets for example
+        uninterned = []
+        for host, payload in self.contacted.items():
+            if keys:
+                payload = {key: payload.get(key) for key in keys}
+            elif not isinstance(payload, dict):
+                payload = dict(payload)
+            payload, group = interner._intern(payload)
+            if group is None:
+                for index, other in enumerate(uninterned):
+                    if other == payload:
+                        break
+                else:
+                    index = len(uninterned)
+                    uninterned.append(payload)
+                group = (None, index)
+            groups.setdefault(group, []).append(host)
+        return list(groups.values())
+
+    def failed_hosts(self):
+        """Return the contacted hosts whose module call failed."""
+        return self.where(failed=True)
+
+    def to_numpy(self):
+        """Return the status columns as NumPy arrays, a missing `rc` being NaN."""
+        try:
+            import numpy as np
+        except ImportError as exc:
+            msg = "to_numpy() requires numpy, see the `columnar` extra"
+            raise ImportError(msg) from exc
+        columns = self.columns()
+        arrays = {"host": np.array(columns["host"], dtype=object)}
+        for field in STATUS_FIELDS:
+            if field == "rc":
+                rc = [np.nan if value is None else value for value in columns[field]]
+                arrays[field] = np.array(rc, dtype=float)
+            else:
+                arrays[field] = np.array(columns[field], dtype=bool)
+        return arrays
+
+    def to_arrow(self):
+        """Return the status columns as a PyArrow table, a missing `rc` being null."""
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            msg = "to_arrow() requires pyarrow, see the `columnar` extra"
+            raise ImportError(msg) from exc
+        columns = self.columns()
+        return pa.table(
+            {
+                "host": pa.array(columns["host"], type=pa.string()),
+                **{
+                    field: pa.array(columns[field], type=pa.bool_())
+                    for field in STATUS_FIELDS
+                    if field != "rc"
+                },
+                "rc": pa.array(columns["rc"], type=pa.int64()),
+            },
+        )
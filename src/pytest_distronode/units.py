@@ -4,6 +4,7 @@ from __future__ import annotations
 import logging
 import os
 import sys
+import warnings
 
 from pathlib import Path
 
@@ -31,6 +32,22 @@ try:
 except ImportError:
     HAS_COLLECTION_FINDER = False
 
+try:
+    # init_plugin_loader was introduced in Distronode-core change here, v2.15
+    # https://github.com/distronode/distronode/pull/78915
+    from distronode.plugins.loader import init_plugin_loader
+
+    HAS_CUSTOM_LOADER_SUPPORT = True
+except ImportError:
+    HAS_CUSTOM_LOADER_SUPPORT = False
+
+# The collection paths last injected with acf_inject
+injected_collections_paths: list[str] = []
+
+# The paths the plugin loader was initialized with, and how many times it was
+plugin_loader_paths: tuple[tuple[str, ...], tuple[str, ...]] | None = None
+plugin_loader_init_count = 0
+
 
 def get_collection_name(start_path: Path) -> tuple[str | None, str | None]:
     """Get the collection namespace and name from the galaxy.yml file.
@@ -146,6 +163,8 @@ def acf_inject(paths: list[str]) -> None:
     :param paths: The paths to inject
     """
     # pylint: disable=protected-access
+    global injected_collections_paths  # pylint: disable=global-statement
+    injected_collections_paths = [str(path) for path in paths]
     if HAS_COLLECTION_FINDER:
         acf = _DistronodeCollectionFinder(paths=paths)
         acf._install()
@@ -155,6 +174,36 @@ def acf_inject(paths: list[str]) -> None:
         logger.debug("_ACF not available")
 
 
+def ensure_plugin_loader(collections_paths: list[str]) -> bool:
+    """Initialize the plugin loader, once per set of collection paths.
+
+    The loader is only initialized again when `collections_paths`, or the
+    paths injected with acf_inject, change.
+
+    :param collections_paths: The collection paths to prefix the loader with
+    :returns: Whether the plugin loader was initialized
+    """
+    global plugin_loader_paths, plugin_loader_init_count  # pylint: disable=global-statement
+    if not HAS_CUSTOM_LOADER_SUPPORT:
+        return False
+
+    paths = (tuple(collections_paths), tuple(injected_collections_paths))
+    if paths == plugin_loader_paths:
+        return False
+
+    with warnings.catch_warnings():
+        # The collection finder is expected to be installed by acf_inject
+        warnings.filterwarnings(
+            "ignore",
+            message="DistronodeCollectionFinder has already been configured",
+        )
+        init_plugin_loader(collections_paths)
+    plugin_loader_paths = paths
+    plugin_loader_init_count += 1
+    logger.debug("Plugin loader initialized: %s", paths)
+    return True
+
+
 def determine_envvar() -> str:
     """Use the existence of the DistronodeCollectionFinder to determine the distronode version.
 
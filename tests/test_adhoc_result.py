@@ -1,3 +1,5 @@
+import sys
+
 from types import GeneratorType
 
 import pytest
@@ -140,3 +142,185 @@ def test_connection_failure_extra_inventory_v2():
         "Failed to connect to the host via ssh"
         in exc_info.value.dark["unknown.example.extra.com"]["msg"]
     )
+
+
+def test_cached_views(adhoc_result):
+    host = ALL_HOSTS[0]
+    result = adhoc_result[host]
+    assert getattr(adhoc_result, host) is result
+    assert dict(adhoc_result.items())[host] is result
+    assert result in adhoc_result.values()
+    assert result._data is adhoc_result.contacted[host]
+
+
+FLEET_RESULTS = {
+    "web1": {"changed": True, "rc": 0},
+    "web2": {"changed": False},
+    "db1": {"failed": True, "msg": "boom"},
+    "db2": {"rc": 2},
+    "cache1": {"skipped": True},
+}
+
+
+def test_status_columns():
+    from pytest_distronode.results import AdHocResult
+
+    result = AdHocResult(contacted=FLEET_RESULTS)
+    columns = result.columns()
+    assert columns["host"] == tuple(FLEET_RESULTS)
+    assert columns["changed"] == (True, False, False, False, False)
+    assert columns["rc"] == (0, None, None, 2, None)
+    assert result.columns() is columns
+    assert result.counts() == {
+        "ok": 1,
+        "changed": 1,
+        "failed": 2,
+        "skipped": 1,
+        "unreachable": 0,
+    }
+    assert result.failed_hosts() == ["db1", "db2"]
+    assert result.where(changed=True) == ["web1"]
+    assert result.where(ok=True, rc=None) == ["web2"]
+    assert result.where(rc=2, failed=True) == ["db2"]
+    assert AdHocResult(contacted={}).counts()["ok"] == 0
+    with pytest.raises(TypeError):
+        result.where(broken=True)
+    # the status columns agree with the ModuleResult flags
+    for field in ("ok", "changed", "failed", "skipped", "unreachable"):
+        assert list(columns[field]) == [
+            getattr(value, f"is_{field}") for value in result.values()
+        ]
+
+
+def test_status_from_callback(adhoc_result):
+    assert set(adhoc_result._status) == set(ALL_HOSTS)
+    assert adhoc_result.counts()["ok"] == len(ALL_HOSTS)
+    assert adhoc_result.failed_hosts() == []
+
+
+def test_status_to_numpy():
+    numpy = pytest.importorskip("numpy")
+    from pytest_distronode.results import AdHocResult
+
+    arrays = AdHocResult(contacted=FLEET_RESULTS).to_numpy()
+    assert arrays["failed"].dtype == bool
+    assert int(arrays["failed"].sum()) == 2
+    assert numpy.isnan(arrays["rc"][1])
+
+
+def test_status_to_arrow():
+    pytest.importorskip("pyarrow")
+    from pytest_distronode.results import AdHocResult
+
+    table = AdHocResult(contacted=FLEET_RESULTS).to_arrow()
+    assert table.num_rows == len(FLEET_RESULTS)
+    assert table.column("rc").null_count == 3
+
+
+def test_status_columns_missing_library(monkeypatch):
+    from pytest_distronode.results import AdHocResult
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    adhoc_result = AdHocResult(contacted=FLEET_RESULTS)
+    with pytest.raises(ImportError, match="columnar"):
+        adhoc_result.to_numpy()
+    with pytest.raises(ImportError, match="columnar"):
+        adhoc_result.to_arrow()
+
+
+def test_result_interner():
+    from pytest_distronode.results import ResultInterner
+
+    interner = ResultInterner()
+    first = interner.intern(
+        {"rc": 0, "stdout_lines": ["a", "b"], "invocation": {"x": 1}},
+    )
+    second = interner.intern(
+        {"invocation": {"x": 1}, "stdout_lines": ["a", "b"], "rc": 0},
+    )
+    third = interner.intern(
+        {"rc": 1, "stdout_lines": ["a", "b"], "invocation": {"x": 1}},
+    )
+    assert second is first
+    assert third is not first
+    assert third == {"rc": 1, "stdout_lines": ["a", "b"], "invocation": {"x": 1}}
+    assert third["stdout_lines"] is first["stdout_lines"]
+    assert third["invocation"] is first["invocation"]
+    # True and 1 are equal, but not the same result
+    assert interner.intern([True]) is not interner.intern([1])
+    # values which cannot be hashed are kept as they are
+    unhashable = {"value": {"set"}.__class__([1])}
+    assert interner.intern(unhashable) == unhashable
+    assert interner.intern(unhashable) is not interner.intern(unhashable)
+
+
+def test_group_by_result():
+    from pytest_distronode.results import AdHocResult
+
+    result = AdHocResult(
+        contacted={
+            "web1": {"rc": 0, "stdout": "1.2", "start": "10:00"},
+            "web2": {"rc": 0, "stdout": "1.2", "start": "10:01"},
+            "web3": {"rc": 0, "stdout": "1.1", "start": "10:00"},
+            "web4": {"start": "10:00", "stdout": "1.2", "rc": 0},
+        },
+    )
+    assert result.group_by_result() == [["web1", "web4"], ["web2"], ["web3"]]
+    assert result.group_by_result("stdout", "rc") == [
+        ["web1", "web2", "web4"],
+        ["web3"],
+    ]
+
+
+def test_group_by_uninternable_result():
+    from pytest_distronode.results import AdHocResult
+
+    contacted = {f"host{index}": {"ports": {index}} for index in range(200)}
+    contacted["host200"] = {"ports": {0}}
+    groups = AdHocResult(contacted=contacted).group_by_result()
+    assert len(groups) == 200
+    assert groups[0] == ["host0", "host200"]
+
+
+def test_result_store():
+    import pickle
+
+    from pytest_distronode.results import AdHocResult, ResultStore, SpilledResult
+
+    store = ResultStore(budget=2000, threshold=500)
+    small = store.store({"rc": 0, "stdout": "x"})
+    large = {"rc": 1, "stdout": "y" * 1000}
+    kept = store.store(dict(large, rc=0))
+    spilled = store.store(large)
+    assert isinstance(small, dict)
+    assert isinstance(kept, dict)
+    assert isinstance(spilled, SpilledResult)
+    assert store.spilled == 1
+    assert spilled == large
+    assert pickle.loads(pickle.dumps(spilled)) == large
+    assert len(pickle.dumps(spilled)) < len(large["stdout"])
+    result = AdHocResult(contacted={"web1": kept, "web2": spilled})
+    assert result["web2"]["stdout"] == large["stdout"]
+    assert result.failed_hosts() == ["web2"]
+    assert result.group_by_result() == [["web1"], ["web2"]]
+
+
+def test_project_result():
+    from pytest_distronode.results import project_result
+
+    payload = {"rc": 1, "stdout": "x", "stdout_lines": ["x"], "invocation": {}}
+    assert project_result(payload) is payload
+    assert project_result(payload, keep=["stdout"]) == {"rc": 1, "stdout": "x"}
+    assert project_result(payload, drop=["rc", "invocation", "stdout_lines"]) == {
+        "rc": 1,
+        "stdout": "x",
+    }
+    assert project_result(
+        payload,
+        keep=["stdout", "invocation"],
+        drop=["invocation"],
+    ) == {
+        "rc": 1,
+        "stdout": "x",
+    }
@@ -85,3 +85,26 @@ def test_localhost(testdir, option):
     result = testdir.runpytest(*option.args)
     assert result.ret == EXIT_OK
     assert result.parseoutcomes()["passed"] == 1
+
+
+def test_distronode_host(testdir, option):
+    src = """
+        import pytest
+        def test_func(distronode_host):
+            assert distronode_host.host_pattern in (
+                "localhost", "127.0.0.2", "127.0.0.3", "127.0.0.4", "127.0.0.5"
+            )
+            assert len(distronode_host) == 1
+    """
+    testdir.makepyfile(src)
+    result = testdir.runpytest(
+        *[
+            *option.args,
+            "--distronode-inventory",
+            str(option.inventory),
+            "--distronode-host-pattern",
+            "local",
+        ],
+    )
+    assert result.ret == EXIT_OK
+    assert result.parseoutcomes()["passed"] == 5
@@ -79,3 +79,532 @@ def test_defaults(request):
 
     assert "connection" in hosts.options
     assert hosts.options["connection"] == DEFAULT_TRANSPORT
+
+
+def test_host_resolution_cached(hosts):
+    from unittest import mock
+
+    inventory_manager = hosts.options["inventory_manager"]
+    with mock.patch.object(
+        inventory_manager,
+        "list_hosts",
+        wraps=inventory_manager.list_hosts,
+    ) as list_hosts:
+        assert "localhost" in hosts
+        assert hasattr(hosts, "localhost")
+        assert hosts["localhost"]
+        assert list_hosts.call_count == 1
+
+        hosts.options["inventory_index"].invalidate()
+        assert "localhost" in hosts
+        assert list_hosts.call_count == 2
+
+
+def test_subset_applied_once(hosts):
+    from unittest import mock
+
+    hosts.options["subset"] = "localhost"
+    inventory_manager = hosts.options["inventory_manager"]
+    with mock.patch.object(
+        inventory_manager,
+        "subset",
+        wraps=inventory_manager.subset,
+    ) as subset:
+        assert list(hosts.all.ping()) == ["localhost"]
+        assert list(hosts.all.ping()) == ["localhost"]
+        subset.assert_called_once_with("localhost")
+
+
+def test_subset_list():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,yet_another_host,",
+        connection="local",
+        subset=["localhost", "another_host"],
+    )
+    assert sorted(hosts.keys()) == ["another_host", "localhost"]
+    assert "yet_another_host" not in hosts.all
+    assert list(hosts.localhost.ping()) == ["localhost"]
+
+
+def test_host_manager_pool():
+    from pytest_distronode.host_manager import HostManagerPool
+
+    pool = HostManagerPool(size=2)
+    localhost = pool.get(inventory="localhost,", connection="local")
+    inventory_manager = localhost.options["inventory_manager"]
+    reused = pool.get(connection="local", inventory="localhost,")
+    assert reused.options["inventory_manager"] is inventory_manager
+
+    other = pool.get(inventory="another_host,", connection="local")
+    # localhost is now the most recently used, `other` gets evicted
+    reused = pool.get(inventory="localhost,", connection="local")
+    assert reused.options["inventory_manager"] is inventory_manager
+    pool.get(inventory="yet_another_host,", connection="local")
+    assert len(pool) == 2
+    assert localhost in pool
+    assert other not in pool
+
+    pool.invalidate(inventory="localhost,", connection="local")
+    assert localhost not in pool
+    rebuilt = pool.get(inventory="localhost,", connection="local")
+    assert rebuilt.options["inventory_manager"] is not inventory_manager
+
+    pool.invalidate()
+    assert len(pool) == 0
+
+
+def test_host_manager_pool_disabled():
+    from pytest_distronode.host_manager import HostManagerPool
+
+    pool = HostManagerPool(size=0)
+    localhost = pool.get(inventory="localhost,", connection="local")
+    rebuilt = pool.get(inventory="localhost,", connection="local")
+    assert (
+        rebuilt.options["inventory_manager"]
+        is not localhost.options["inventory_manager"]
+    )
+    assert len(pool) == 0
+
+
+def test_host_manager_pool_isolation():
+    from pytest_distronode.host_manager import HostManagerPool
+
+    pool = HostManagerPool()
+    kwargs = {"inventory": "localhost,", "connection": "local"}
+    hosts = pool.get(**kwargs)
+    hosts.localhost.set_fact(foo="leaked")
+    assert hosts.localhost.debug(var="foo")["localhost"]["foo"] == "leaked"
+    hosts.options["forks"] = 1
+    reused = pool.get(**kwargs)
+    assert reused.options["inventory_manager"] is hosts.options["inventory_manager"]
+    assert "forks" not in reused.options
+    assert reused.localhost.debug(var="foo")["localhost"]["foo"] == (
+        "VARIABLE IS NOT DEFINED!"
+    )
+
+
+def test_initialize_reuses_host_manager(request):
+    plugin = request.config.pluginmanager.getplugin("distronode")
+    hosts = plugin.initialize(inventory="localhost,", connection="local")
+    inventory_manager = hosts.options["inventory_manager"]
+    reused = plugin.initialize(inventory="localhost,", connection="local")
+    assert reused.options["inventory_manager"] is inventory_manager
+    plugin.host_managers.invalidate()
+    rebuilt = plugin.initialize(inventory="localhost,", connection="local")
+    assert rebuilt.options["inventory_manager"] is not inventory_manager
+
+
+def test_dispatcher_does_not_change_host_pattern(hosts):
+    hosts.options["host_pattern"] = "all"
+    assert hosts.localhost.options["host_pattern"] == "localhost"
+    assert hosts["another_host"].options["host_pattern"] == "another_host"
+    assert hosts.options["host_pattern"] == "all"
+
+
+INVENTORY_INI = """
+[web]
+web1 http_port=80
+web2 distronode_port=2222
+
+[db]
+db1
+
+[servers:children]
+web
+db
+
+[servers:vars]
+tier=prod
+
+[web:vars]
+distronode_group_priority=5
+"""
+
+
+def _snapshot_host_manager(tmp_path):
+    from pytest_distronode.host_manager import get_host_manager
+
+    return get_host_manager(
+        inventory=str(tmp_path / "inventory.ini"),
+        connection="local",
+        inventory_cache=60,
+        inventory_cache_dir=str(tmp_path / "cache"),
+    )
+
+
+def test_inventory_snapshot(tmp_path):
+    from unittest import mock
+
+    from distronode.inventory.manager import InventoryManager
+
+    (tmp_path / "inventory.ini").write_text(INVENTORY_INI)
+    parsed = _snapshot_host_manager(tmp_path)
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 1
+
+    with mock.patch.object(InventoryManager, "parse_sources") as parse_sources:
+        loaded = _snapshot_host_manager(tmp_path)
+        assert not parse_sources.called
+
+    assert loaded.keys() == parsed.keys()
+    assert set(loaded.options["inventory_manager"].groups) == set(
+        parsed.options["inventory_manager"].groups,
+    )
+    assert loaded._hosts("servers") == parsed._hosts("servers")
+    inventory_manager = loaded.options["inventory_manager"]
+    assert inventory_manager.get_host("web1").vars["http_port"] == 80
+    assert inventory_manager.get_host("web2").vars["distronode_port"] == 2222
+    assert inventory_manager.groups["servers"].vars["tier"] == "prod"
+    assert inventory_manager.groups["web"].priority == 5
+    assert inventory_manager._sources == [str(tmp_path / "inventory.ini")]
+
+
+def test_inventory_snapshot_invalidated(tmp_path):
+    import os
+
+    from pytest_distronode.inventory import InventorySnapshot
+
+    (tmp_path / "inventory.ini").write_text(INVENTORY_INI)
+    _snapshot_host_manager(tmp_path)
+
+    # a changed source is parsed again
+    (tmp_path / "inventory.ini").write_text(INVENTORY_INI + "\n[new]\nnew1\n")
+    assert "new1" in _snapshot_host_manager(tmp_path)
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 2
+
+    # so is an expired snapshot
+    snapshot = InventorySnapshot(
+        str(tmp_path / "inventory.ini"),
+        str(tmp_path / "cache"),
+        60,
+    )
+    os.utime(snapshot.path, (0, 0))
+    _snapshot_host_manager(tmp_path)
+    assert snapshot.path.stat().st_mtime > 0
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_inventory_snapshot_not_saved_on_failure(tmp_path, workers):
+    import sys
+
+    from distronode.parsing.dataloader import DataLoader
+
+    from pytest_distronode.inventory import InventorySnapshot
+
+    (tmp_path / "inventory.ini").write_text(INVENTORY_INI)
+    script = tmp_path / "failing.py"
+    script.write_text(f"#!{sys.executable}\nraise SystemExit(1)\n")
+    script.chmod(0o755)
+    snapshot = InventorySnapshot(
+        [str(tmp_path / "inventory.ini"), str(script)],
+        str(tmp_path / "cache"),
+        60,
+        workers=workers,
+    )
+    inventory_manager = snapshot.inventory_manager(DataLoader())
+    assert "web1" in inventory_manager.hosts
+    assert not list(tmp_path.glob("cache/*.json"))
+
+
+INVENTORY_SCRIPT = """#!{python}
+import json
+import os
+
+print(json.dumps({{
+    "{group}": {{"hosts": ["{host}", "shared"], "vars": {{"source": "{group}"}}}},
+    "_meta": {{"hostvars": {{
+        "{host}": {{"parser_pid": os.getppid()}},
+        "shared": {{"source": "{group}"}},
+    }}}},
+}}))
+"""
+
+
+def _inventory_scripts(tmp_path):
+    import sys
+
+    paths = []
+    for group, host in (("first", "host1"), ("second", "host2")):
+        path = tmp_path / f"{group}.py"
+        path.write_text(
+            INVENTORY_SCRIPT.format(python=sys.executable, group=group, host=host),
+        )
+        path.chmod(0o755)
+        paths.append(str(path))
+    return paths
+
+
+def test_split_sources(tmp_path):
+    from pytest_distronode.inventory import split_sources
+
+    paths = _inventory_scripts(tmp_path)
+    assert split_sources(",".join(paths)) == paths
+    assert split_sources(paths) == paths
+    assert split_sources("localhost,another_host,") == ["localhost,another_host,"]
+    assert split_sources(f"{paths[0]},another_host") == [f"{paths[0]},another_host"]
+
+
+def test_parse_inventory_in_parallel(tmp_path):
+    import os
+
+    from distronode.parsing.dataloader import DataLoader
+
+    from pytest_distronode.inventory import parse_inventory
+
+    paths = _inventory_scripts(tmp_path)
+    sequential = parse_inventory(DataLoader(), paths)
+    parallel = parse_inventory(DataLoader(), ",".join(paths), workers=2)
+
+    assert parallel._sources == paths
+    assert set(parallel.hosts) == set(sequential.hosts) == {"host1", "host2", "shared"}
+    assert set(parallel.groups) == set(sequential.groups)
+    assert parallel.groups["first"].vars["source"] == "first"
+    # later sources override the vars of the earlier ones, as when sequential
+    shared = parallel.get_host("shared")
+    assert shared.vars["source"] == sequential.get_host("shared").vars["source"]
+    assert {group.name for group in shared.groups} == {"all", "first", "second"}
+    # each source was parsed by its own process
+    pids = {parallel.get_host(host).vars["parser_pid"] for host in ("host1", "host2")}
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+
+
+INVENTORY_DATA = {
+    "web": {"hosts": ["web1", "web2"], "vars": {"http_port": 80}},
+    "db": ["db1"],
+    "servers": {"children": ["web", "db"], "vars": {"tier": "prod"}},
+    "_meta": {
+        "hostvars": {
+            "web2": {"http_port": 8080},
+            "local": {"distronode_connection": "local"},
+        },
+    },
+}
+
+
+def test_inventory_from_data():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory=INVENTORY_DATA, connection="local")
+    assert set(hosts.keys()) == {"web1", "web2", "db1", "local"}
+    assert set(hosts.options["inventory_manager"].groups) == {
+        "all",
+        "ungrouped",
+        "web",
+        "db",
+        "servers",
+    }
+    assert "servers" in hosts
+    assert hosts._hosts("servers")[0] == ("web1", "web2", "db1")
+    assert hosts._hosts("ungrouped")[0] == ("local",)
+    variable_manager = hosts.options["variable_manager"]
+    inventory_manager = hosts.options["inventory_manager"]
+    web1 = variable_manager.get_vars(host=inventory_manager.get_host("web1"))
+    web2 = variable_manager.get_vars(host=inventory_manager.get_host("web2"))
+    assert (web1["http_port"], web1["tier"]) == (80, "prod")
+    assert web2["http_port"] == 8080
+    assert hosts.local.ping()["local"]["ping"] == "pong"
+
+
+def test_inventory_from_data_pooled():
+    from pytest_distronode.host_manager import HostManagerPool
+
+    pool = HostManagerPool()
+    hosts = pool.get(inventory=INVENTORY_DATA, connection="local")
+    reused = pool.get(inventory=dict(INVENTORY_DATA), connection="local")
+    assert reused.options["inventory_manager"] is hosts.options["inventory_manager"]
+    assert len(pool) == 1
+
+
+def test_change_inventory():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,another_host,", connection="local")
+    index = hosts.options["inventory_index"]
+    assert hosts._hosts("another_host")[0] == ("another_host",)
+
+    hosts.add_host("new_host", groups=["web"], http_port=80)
+    assert "new_host" in hosts
+    assert hosts._hosts("web")[0] == ("new_host",)
+    # hosts resolved for unrelated names are kept
+    assert ("another_host", None) in index._hosts
+    assert hosts.new_host.ping()["new_host"]["ping"] == "pong"
+
+    hosts.add_group("servers", hosts=["another_host"], children=["web"], tier="prod")
+    assert set(hosts._hosts("servers")[0]) == {"new_host", "another_host"}
+    assert hosts._hosts("ungrouped")[0] == ("localhost",)
+
+    hosts.set_host_var("new_host", "http_port", 8080)
+    new_host = hosts.options["inventory_manager"].get_host("new_host")
+    variables = hosts.options["variable_manager"].get_vars(host=new_host)
+    assert (variables["http_port"], variables["tier"]) == (8080, "prod")
+
+    hosts.remove_host("new_host")
+    assert "new_host" not in hosts
+    assert hosts._hosts("servers")[0] == ("another_host",)
+    with pytest.raises(KeyError):
+        hosts.remove_host("new_host")
+    with pytest.raises(KeyError):
+        hosts.set_host_var("new_host", "http_port", 80)
+
+
+def test_add_host_module():
+    """Verify that hosts added by the add_host module are found."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,another_host,", connection="local")
+    assert "newhost" not in hosts
+    hosts.localhost.add_host(name="newhost", groups="web")
+    assert "newhost" in hosts
+    assert set(hosts.web.ping()) == {"newhost"}
+
+
+def test_group_by_module():
+    """Verify that hosts resolved before a group_by task are resolved again."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,another_host,", connection="local")
+    hosts.localhost.group_by(key="tier")
+    assert hosts._hosts("tier")[0] == ("localhost",)
+    # the group exists already, only its hosts change
+    hosts.another_host.group_by(key="tier")
+    assert set(hosts._hosts("tier")[0]) == {"localhost", "another_host"}
+
+    assert len(hosts) == 2
+    hosts.options["inventory_manager"].add_host("direct_host", group="ungrouped")
+    assert len(hosts) == 3
+
+
+def test_changed_host_manager_not_pooled():
+    from pytest_distronode.host_manager import HostManagerPool
+
+    pool = HostManagerPool()
+    kwargs = {"inventory": "localhost,another_host,", "connection": "local"}
+    hosts = pool.get(**kwargs)
+    hosts.set_host_var("another_host", "http_port", 80)
+    rebuilt = pool.get(**kwargs)
+    assert (
+        rebuilt.options["inventory_manager"] is not hosts.options["inventory_manager"]
+    )
+
+
+def test_query_vars():
+    from unittest import mock
+
+    import distronode.errors
+
+    from pytest_distronode.errors import DistronodeNoHostsMatch
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory=INVENTORY_DATA, connection="local")
+    assert hosts["web2"].vars["http_port"] == 8080
+    assert hosts["web2"].vars["tier"] == "prod"
+    assert hosts["web2"].vars["inventory_hostname"] == "web2"
+    assert {handle.vars["inventory_hostname"] for handle in hosts} == set(hosts.keys())
+    assert hosts.query_vars("web", keys=["http_port", "missing"]) == {
+        "web1": {"http_port": 80},
+        "web2": {"http_port": 8080},
+    }
+    assert set(hosts.query_vars()) == {"web1", "web2", "db1", "local"}
+    with pytest.raises(TypeError):
+        hosts["web1"].vars["http_port"] = 443
+    with pytest.raises(distronode.errors.DistronodeError):
+        hosts["web"].vars  # noqa: B018
+    missing = hosts._dispatcher(**{**hosts.options, "host_pattern": "missing*"})
+    with pytest.raises(DistronodeNoHostsMatch):
+        missing.vars  # noqa: B018
+
+    # the variables are computed once, until the inventory changes
+    variable_manager = hosts.options["variable_manager"]
+    with mock.patch.object(variable_manager, "get_vars") as get_vars:
+        hosts.query_vars("web")
+        assert not get_vars.called
+    hosts.set_host_var("web1", "http_port", 443)
+    assert hosts["web1"].vars["http_port"] == 443
+    hosts.add_group("db", tier="dev")
+    assert hosts.query_vars("db1", keys=["tier"]) == {"db1": {"tier": "dev"}}
+
+
+def test_query_vars_after_set_fact():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,", connection="local")
+    assert "foo" not in hosts.localhost.vars
+    hosts.localhost.set_fact(foo="bar")
+    assert hosts.localhost.vars["foo"] == "bar"
+
+
+def test_membership_index(hosts):
+    from unittest import mock
+
+    inventory_manager = hosts.options["inventory_manager"]
+    with mock.patch.object(
+        inventory_manager,
+        "list_hosts",
+        wraps=inventory_manager.list_hosts,
+    ) as list_hosts:
+        # plain host and group names are looked up
+        assert "another_host" in hosts
+        assert "ungrouped" in hosts
+        assert "unknown_host" not in hosts
+        assert hosts["yet_another_host"].options["host_pattern"] == "yet_another_host"
+        assert not list_hosts.called
+
+        # patterns are evaluated
+        assert "another_*" in hosts
+        assert "all:!another_host" in hosts
+        assert "unknown_*" not in hosts
+        assert list_hosts.call_count == 3
+
+
+def test_membership_index_subset():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="another_host,localhost,yet_another_host",
+        connection="local",
+        subset="another_host",
+    )
+    assert "another_host" in hosts
+    assert "yet_another_host" not in hosts
+    assert "all" in hosts
+
+
+def test_host_handles(hosts):
+    from pytest_distronode.host_manager import HostHandle
+
+    hosts.options["host_pattern"] = "all"
+    handles = list(hosts)
+    assert [handle.host_pattern for handle in handles] == list(ALL_HOSTS)
+    assert all(isinstance(handle, HostHandle) for handle in handles)
+    assert all(handle._dispatcher is None for handle in handles)
+
+    handle = handles[0]
+    assert len(handle) == 1
+    assert handle.host_pattern in handle
+    assert handle.options["host_pattern"] == handle.host_pattern
+    assert handle.dispatcher is handle.dispatcher
+    with pytest.raises(AttributeError):
+        handle.host_pattern = "all"
+
+
+def test_merged_extra_inventory(tmp_path):
+    from pytest_distronode.host_manager import get_host_manager
+
+    (tmp_path / "extra.ini").write_text("[extra]\nyet_another_host extra_var=1\n")
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory=str(tmp_path / "extra.ini"),
+        merge_extra_inventory=True,
+        connection="local",
+    )
+    assert "extra_inventory_manager" not in hosts.options
+    assert set(hosts.keys()) == set(ALL_HOSTS)
+    assert hosts.get_extra_inventory_hosts() == ["yet_another_host"]
+    assert hosts.get_extra_inventory_hosts("another_host") == []
+    assert set(hosts.get_extra_inventory_groups()) == {"all", "ungrouped", "extra"}
+    assert "extra" in hosts
+    inventory_manager = hosts.options["inventory_manager"]
+    assert inventory_manager.get_host("yet_another_host").vars["extra_var"] == 1
+    assert str(tmp_path / "extra.ini") in inventory_manager._sources
@@ -1,6 +1,6 @@
 import pytest
 
-from conftest import NEGATIVE_HOST_PATTERNS, POSITIVE_HOST_PATTERNS
+from conftest import ALL_HOSTS, NEGATIVE_HOST_PATTERNS, POSITIVE_HOST_PATTERNS
 
 
 def test_runtime_error():
@@ -48,3 +48,387 @@ def test_distronode_module_error(hosts):
         str(exc_info.value)
         == f"The module {'a_module_that_most_certainly_does_not_exist'} was not found in configured module paths."
     )
+
+
+def test_engine_reused_across_calls(hosts):
+    """Verify that consecutive module calls share one task queue manager."""
+    hosts.all.ping()
+    hosts.localhost.ping()
+    assert hosts.options["engine"].builds == 1
+
+
+def test_engine_does_not_carry_failed_hosts(hosts):
+    """Verify that hosts failing one call are still targeted by the next."""
+    failed = hosts.all.command("false")
+    assert all(result.is_failed for result in failed.values())
+
+    contacted = hosts.all.ping()
+    assert len(contacted) == len(ALL_HOSTS)
+    assert all(result.is_successful for result in contacted.values())
+
+
+def test_batch(hosts):
+    """Verify that queued module calls return one result per call."""
+    with hosts.all.batch() as batch:
+        assert batch.ping() == 0
+        assert batch.command("false") == 1
+        assert batch.command("echo", "hello") == 2
+
+    assert len(batch) == 3
+    assert all(result.is_successful for result in batch[0].values())
+    assert all(result.is_failed for result in batch[1].values())
+    assert set(batch[2]) == set(ALL_HOSTS)
+    for result in batch[2].values():
+        assert result["stdout"] == "hello"
+    assert hosts.options["engine"].builds == 1
+
+
+def test_batch_module_error(hosts):
+    """Verify that DistronodeModuleError is raised when queueing an unknown module."""
+    from pytest_distronode.errors import DistronodeModuleError
+
+    with pytest.raises(DistronodeModuleError), hosts.all.batch() as batch:
+        batch.a_module_that_most_certainly_does_not_exist()
+    assert not batch.results
+
+
+def test_extra_inventory_results_merged():
+    """Verify that results of the inventory and the extra inventory are merged."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory="yet_another_host,",
+        connection="local",
+    )
+    contacted = hosts.all.ping()
+    assert set(contacted) == set(ALL_HOSTS)
+    assert all(result.is_successful for result in contacted.values())
+
+
+def test_extra_inventory_batch():
+    """Verify that batched results of both inventories are merged per call."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory="yet_another_host,",
+        connection="local",
+    )
+    with hosts.all.batch() as batch:
+        batch.ping()
+        batch.command("echo", "hello")
+    assert set(batch[0]) == set(ALL_HOSTS)
+    assert set(batch[1]) == set(ALL_HOSTS)
+    assert hosts.options["extra_engine"].builds == 1
+    # loaded in this process, not in the child running the extra play
+    assert hosts.options["extra_engine"]._tqm._callbacks_loaded
+
+
+def test_extra_inventory_keeps_changes():
+    """Verify that the facts and hosts set by the forked extra play are kept."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory="yet_another_host,",
+        connection="local",
+    )
+    hosts.all.set_fact(foo="bar")
+    contacted = hosts.all.debug(var="foo")
+    assert {result["foo"] for result in contacted.values()} == {"bar"}
+
+    hosts.yet_another_host.add_host(name="extra_new_host", groups="extra_web")
+    assert "extra_new_host" in hosts.options["extra_inventory_manager"].hosts
+
+
+def test_cli_context_parsed_once(hosts, monkeypatch):
+    """Verify that the CLI context is only parsed again when options change."""
+    from unittest import mock
+
+    from pytest_distronode.module_dispatcher import v213
+
+    monkeypatch.setattr(v213.ModuleDispatcherV213, "_context_key", None)
+    with mock.patch.object(v213, "AdHocCLI", wraps=v213.AdHocCLI) as adhoc_cli:
+        hosts.all.ping()
+        hosts.localhost.ping()
+        hosts["another_host"].ping()
+        assert adhoc_cli.call_count == 1
+
+        hosts.options["user"] = "somebody"
+        hosts.localhost.ping()
+        assert adhoc_cli.call_count == 2
+
+
+def test_module_index_caches_lookups():
+    """Verify that module lookups hit the module loader once per name."""
+    from unittest import mock
+
+    from pytest_distronode.module_dispatcher import v213
+
+    index = v213.ModuleIndex()
+    with mock.patch.object(
+        v213.module_loader,
+        "has_plugin",
+        wraps=v213.module_loader.has_plugin,
+    ) as has_plugin:
+        assert index.has_module("ping")
+        assert index.has_module("ping")
+        assert not index.has_module("a_module_that_most_certainly_does_not_exist")
+        assert not index.has_module("a_module_that_most_certainly_does_not_exist")
+        assert has_plugin.call_count == 2
+
+
+def test_module_index_adds_paths_once(tmp_path):
+    """Verify that module directories are registered once and drop missing names."""
+    from unittest import mock
+
+    from pytest_distronode.module_dispatcher import v213
+
+    index = v213.ModuleIndex()
+    assert not index.has_module("a_module_that_most_certainly_does_not_exist")
+    with mock.patch.object(v213.module_loader, "add_directory") as add_directory:
+        index.add_paths([str(tmp_path)])
+        index.add_paths(str(tmp_path))
+        assert add_directory.call_count == 1
+    assert "a_module_that_most_certainly_does_not_exist" not in index.modules
+
+
+def test_play_keywords(monkeypatch):
+    """Verify that forks, strategy and serial are passed to the play."""
+    from distronode.playbook.play import Play
+
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="another_host,localhost,yet_another_host",
+        connection="local",
+        forks=2,
+        strategy="free",
+        serial=1,
+        max_fail_percentage=50,
+    )
+    plays = []
+    load = Play.load
+
+    def load_play(data, *args, **kwargs):
+        play = load(data, *args, **kwargs)
+        plays.append(play)
+        return play
+
+    monkeypatch.setattr(Play, "load", staticmethod(load_play))
+    contacted = hosts.all.ping()
+    assert set(contacted) == set(ALL_HOSTS)
+    assert plays[0].strategy == "free"
+    assert plays[0].serial == 1
+    assert plays[0].max_fail_percentage == 50
+    assert hosts.options["engine"]._tqm._forks == 2
+
+
+def test_stream(hosts):
+    """Verify that host results are yielded as they arrive."""
+    from pytest_distronode.results import ModuleResult
+
+    results = dict(hosts.all.stream().ping())
+    assert set(results) == set(ALL_HOSTS)
+    assert all(isinstance(result, ModuleResult) for result in results.values())
+    assert all(result["ping"] == "pong" for result in results.values())
+
+
+def test_stream_on_result(hosts):
+    """Verify that the callback is called with each host result."""
+    received = []
+    contacted = hosts.all.stream(on_result=lambda *event: received.append(event)).ping()
+    assert {host for host, _ in received} == set(ALL_HOSTS)
+    assert set(contacted) == set(ALL_HOSTS)
+    assert contacted["localhost"]["ping"] == "pong"
+
+
+def test_stream_stop_early(hosts):
+    """Verify that leaving the iteration stops the play."""
+    results = hosts.all.stream().command("sleep", "0.2")
+    host, result = next(results)
+    assert host in ALL_HOSTS
+    assert result.is_successful
+    results.close()
+    # the engine is usable once the stream is closed
+    assert set(hosts.all.ping()) == set(ALL_HOSTS)
+    assert hosts.options["engine"].builds == 2
+
+
+def test_stream_keeps_facts():
+    """Verify that the facts set by a streamed call are kept."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,", connection="local")
+    assert "streamed" not in hosts.localhost.vars
+    list(hosts.localhost.stream().set_fact(streamed="1"))
+    assert hosts.localhost.debug(var="streamed")["localhost"]["streamed"] == "1"
+    # the cached variables of the host are forgotten too
+    assert hosts.localhost.vars["streamed"] == "1"
+
+
+def test_stream_unreachable():
+    """Verify that unreachable hosts are yielded instead of raising."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="unreachable.invalid,", connection="ssh")
+    results = dict(hosts.all.stream().ping())
+    assert results["unreachable.invalid"].is_unreachable
+
+
+def test_stream_extra_inventory():
+    """Verify that both inventories are streamed."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory="yet_another_host,",
+        connection="local",
+    )
+    assert {host for host, _ in hosts.all.stream().ping()} == set(ALL_HOSTS)
+
+
+def test_async(hosts):
+    """Verify that module calls can be awaited concurrently."""
+    import asyncio
+
+    async def main():
+        return await asyncio.gather(
+            hosts.all.async_.ping(),
+            hosts.async_.localhost.command("echo", "hello"),
+            hosts.async_["another_host"].ping(),
+        )
+
+    ping, command, another_ping = asyncio.run(main())
+    assert set(ping) == set(ALL_HOSTS)
+    assert command["localhost"]["stdout"] == "hello"
+    assert set(another_ping) == {"another_host"}
+    # the engine is usable once the calls completed
+    assert set(hosts.all.ping()) == set(ALL_HOSTS)
+
+
+def test_async_keeps_facts():
+    """Verify that the facts set by an awaited call are kept."""
+    import asyncio
+
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="localhost,", connection="local")
+    asyncio.run(hosts.localhost.async_.set_fact(baz="qux"))
+    assert hosts.localhost.debug(var="baz")["localhost"]["baz"] == "qux"
+
+
+def test_async_limit():
+    """Verify that the number of concurrent async calls is limited."""
+    import asyncio
+
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,",
+        connection="local",
+        async_limit=1,
+    )
+    dispatcher = hosts.localhost.async_
+
+    async def main():
+        semaphore = dispatcher._semaphore()
+        calls = [dispatcher.ping() for _ in range(3)]
+        return semaphore, await asyncio.gather(*calls)
+
+    semaphore, results = asyncio.run(main())
+    assert semaphore._value == 1
+    assert all(result["localhost"]["ping"] == "pong" for result in results)
+
+
+def test_async_unreachable():
+    """Verify that unreachable hosts raise when awaiting the call."""
+    import asyncio
+
+    from pytest_distronode.errors import DistronodeConnectionFailure
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(inventory="unreachable.invalid,", connection="ssh")
+    with pytest.raises(DistronodeConnectionFailure):
+        asyncio.run(hosts.all.async_.ping())
+
+
+def test_merged_extra_inventory_single_run():
+    """Verify that a merged extra inventory runs in the same play."""
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory="localhost,another_host,",
+        extra_inventory="yet_another_host,",
+        merge_extra_inventory=True,
+        connection="local",
+    )
+    assert "extra_engine" not in hosts.options
+    contacted = hosts.all.ping()
+    assert set(contacted) == set(ALL_HOSTS)
+    assert set(hosts.yet_another_host.ping()) == {"yet_another_host"}
+
+
+def test_intern_results():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory=",".join(ALL_HOSTS),
+        connection="local",
+        intern_results=True,
+    )
+    contacted = hosts.all.command("echo hello")
+    first, *others = (contacted.contacted[host] for host in ALL_HOSTS)
+    assert first["stdout"] == "hello"
+    assert all(other["stdout"] is first["stdout"] for other in others)
+    assert all(other["invocation"] is first["invocation"] for other in others)
+    assert [sorted(group) for group in contacted.group_by_result("stdout", "rc")] == [
+        sorted(ALL_HOSTS),
+    ]
+
+
+def test_result_budget():
+    from pytest_distronode.host_manager import get_host_manager
+    from pytest_distronode.results import SpilledResult
+
+    hosts = get_host_manager(
+        inventory=",".join(ALL_HOSTS),
+        connection="local",
+        result_budget=1,
+    )
+    # about 600 KB of JSON per host, the first one fits in the budget
+    contacted = hosts.all.command("printf %0300000d 0")
+    spilled = [
+        host
+        for host in ALL_HOSTS
+        if isinstance(contacted.contacted[host], SpilledResult)
+    ]
+    assert spilled
+    assert ALL_HOSTS[0] not in spilled or len(spilled) == len(ALL_HOSTS) - 1
+    assert all(contacted[host]["rc"] == 0 for host in ALL_HOSTS)
+    assert contacted.counts()["failed"] == 0
+
+
+def test_result_projection():
+    from pytest_distronode.host_manager import get_host_manager
+
+    hosts = get_host_manager(
+        inventory=",".join(ALL_HOSTS),
+        connection="local",
+        drop=["invocation"],
+    )
+    contacted = hosts.all.command("echo hello", _keep=["stdout"])
+    assert all(
+        set(contacted[host]) <= {"stdout", "rc", "changed"} for host in ALL_HOSTS
+    )
+    assert contacted.counts()["changed"] == len(ALL_HOSTS)
+    # the options apply to calls without a projection of their own
+    contacted = hosts.all.command("echo hello")
+    assert all("invocation" not in contacted[host] for host in ALL_HOSTS)
+    assert all("stdout_lines" in contacted[host] for host in ALL_HOSTS)
+    with hosts.all.batch() as batch:
+        kept = batch.command("echo hello", _keep=["stdout"])
+        full = batch.command("echo hello", _drop=None)
+    assert all("stdout_lines" not in batch.results[kept][host] for host in ALL_HOSTS)
+    assert all("invocation" in batch.results[full][host] for host in ALL_HOSTS)
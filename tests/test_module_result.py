@@ -119,3 +119,29 @@ def _module_result_unreachable():
 def test_is_property(request, fixture_name, prop, expected_result):
     fixture = request.getfixturevalue(fixture_name)
     assert getattr(fixture, prop) == expected_result
+
+
+def test_view():
+    payload = {"changed": True, "rc": 0, "stdout": "hello"}
+    result = ModuleResult(payload)
+    assert result == payload
+    assert dict(result) == payload
+    assert result.get("missing", 1) == 1
+    assert "stdout" in result
+    assert len(result) == 3
+    # the payload is wrapped, not copied
+    payload["stderr"] = ""
+    assert result["stderr"] == ""
+    assert ModuleResult(result)._data is payload
+    with pytest.raises(TypeError):
+        result["stdout"] = "changed"  # pylint: disable=unsupported-assignment-operation
+    with pytest.raises(AttributeError):
+        result.extra = True  # type: ignore[attr-defined] # pylint: disable=assigning-non-slot
+
+
+def test_flags_computed_once(module_result_failed):
+    assert module_result_failed._flags is None
+    assert module_result_failed.is_failed
+    flags = module_result_failed._flags
+    assert not module_result_failed.is_successful
+    assert module_result_failed._flags is flags
@@ -30,6 +30,7 @@ def test_plugin_help(testdir):
             "pytest-distronode:",
             # Check for the specific args
             "  --inventory=DISTRONODE_INVENTORY, --distronode-inventory=DISTRONODE_INVENTORY",
+            "  --distronode-merge-extra-inventory*",
             "  --host-pattern=DISTRONODE_HOST_PATTERN, --distronode-host-pattern=DISTRONODE_HOST_PATTERN",
             "  --connection=DISTRONODE_CONNECTION, --distronode-connection=DISTRONODE_CONNECTION",
             "  --user=DISTRONODE_USER, --distronode-user=DISTRONODE_USER",
@@ -39,6 +40,11 @@ def test_plugin_help(testdir):
             "  --become-method=DISTRONODE_BECOME_METHOD, --distronode-become-method=DISTRONODE_BECOME_METHOD",
             "  --become-user=DISTRONODE_BECOME_USER, --distronode-become-user=DISTRONODE_BECOME_USER",
             "  --ask-become-pass=DISTRONODE_ASK_BECOME_PASS, --distronode-ask-become-pass=DISTRONODE_ASK_BECOME_PASS",
+            "  --distronode-forks=DISTRONODE_FORKS",
+            "  --distronode-strategy={linear,free,host_pinned}",
+            "  --distronode-serial=DISTRONODE_SERIAL",
+            "  --distronode-max-fail-percentage=DISTRONODE_MAX_FAIL_PERCENTAGE",
+            "  --distronode-async-limit=DISTRONODE_ASYNC_LIMIT",
             # Check for the marker in --help
             "  distronode (args)*Distronode integration",
         ],
@@ -78,7 +84,9 @@ def test_params_not_required_when_not_using_fixture(testdir, option):
     "fixture_name",
     (
         "distronode_adhoc",
+        "distronode_adhoc_async",
         "distronode_module",
+        "distronode_module_async",
         "distronode_facts",
     ),
 )
@@ -148,3 +148,27 @@ def test_pytest_collection_modifyitems_no_fixtures():
     with mock.patch.object(plugin, "assert_required_distronode_parameters") as mock_assert:
         plugin.pytest_collection_modifyitems(None, mock_config, items)
         mock_assert.assert_not_called()
+
+
+def test_pytest_generate_tests_initializes_once():
+    config = MagicMock()
+    config.getoption.side_effect = {
+        "distronode_host_pattern": "localhost",
+        "distronode_inventory": "/etc/distronode/hosts",
+    }.get
+    plugin = PyTestDistronodePlugin(config)
+    config.pluginmanager.getplugin.return_value = plugin
+
+    plugin.initialize = MagicMock(return_value=MagicMock())
+
+    for fixturenames in (
+        ["distronode_host"],
+        ["distronode_host"],
+        ["distronode_group"],
+    ):
+        metafunc = MagicMock()
+        metafunc.fixturenames = fixturenames
+        metafunc.config = config
+        pytest_generate_tests(metafunc)
+
+    plugin.initialize.assert_called_once_with(config=config, pattern="localhost")
@@ -9,6 +9,7 @@ import sys
 
 from typing import TYPE_CHECKING
 
+from pytest_distronode import units
 from pytest_distronode.units import inject, inject_only
 
 
@@ -87,3 +88,25 @@ def test_for_params():
     """Test for params."""
     proc = subprocess.run("pytest --help", shell=True, capture_output=True, check=False)
     assert "--distronode-unit-inject-only" in proc.stdout.decode()
+
+
+def test_ensure_plugin_loader(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the plugin loader is only initialized when the collection paths change.
+
+    :param monkeypatch: The pytest monkeypatch fixture
+    """
+    calls = []
+    monkeypatch.setattr(units, "HAS_CUSTOM_LOADER_SUPPORT", True)
+    monkeypatch.setattr(units, "init_plugin_loader", calls.append, raising=False)
+    monkeypatch.setattr(units, "plugin_loader_paths", None)
+    monkeypatch.setattr(units, "plugin_loader_init_count", 0)
+    monkeypatch.setattr(units, "injected_collections_paths", ["/collections"])
+
+    assert units.ensure_plugin_loader(["/usr/share/collections"])
+    assert not units.ensure_plugin_loader(["/usr/share/collections"])
+    assert units.plugin_loader_init_count == 1
+
+    monkeypatch.setattr(units, "injected_collections_paths", ["/other/collections"])
+    assert units.ensure_plugin_loader(["/usr/share/collections"])
+    assert units.plugin_loader_init_count == 2
+    assert calls == [["/usr/share/collections"], ["/usr/share/collections"]]